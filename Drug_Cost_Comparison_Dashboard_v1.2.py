@@ -1,15 +1,16 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import random
+from chart_cache import price_bar_chart, shared_chart_cache, show_chart_metrics
+from static_assets import img_tag
 
 # Branding
 st.set_page_config(layout="wide")
-st.markdown("""
+st.markdown(f"""
     <div style='display: flex; align-items: center; justify-content: space-between; background-color: #0033A0; padding: 10px 20px; color: white;'>
         <div style='font-size: 24px; font-weight: bold;'>Integrated Drug Cost Comparison Dashboard</div>
-        <img src='https://upload.wikimedia.org/wikipedia/commons/3/3e/Cognizant_logo_2022.svg' width='160'/>
+        {img_tag("brand_logo.svg", 160)}
     </div>
 """, unsafe_allow_html=True)
 
@@ -32,6 +33,7 @@ therapeutic_alternatives = {
 }
 
 pharmacies = ["PharmaOne", "HealthPlus", "MediCare"]
+chart_cache = shared_chart_cache()
 
 # Sidebar
 st.sidebar.title("🔐 User Role")
@@ -71,11 +73,7 @@ if drug_selections and role in ["Patient", "Doctor", "Pharmacist"]:
     for drug in drug_selections:
         generic = drug_data[drug]["generic_price"]
         brand = drug_data[drug]["brand_price"]
-        fig, ax = plt.subplots()
-        ax.bar(["Generic", "Brand"], [generic, brand], color=["green", "red"])
-        ax.set_title(f"{drug} Price Comparison")
-        ax.set_ylabel("Price ($)")
-        st.pyplot(fig)
+        st.image(price_bar_chart(chart_cache, f"{drug} Price Comparison", generic, brand))
 
 # Savings Estimator
 if drug_selections and role in ["Patient", "Insurance Analyst"]:
@@ -149,3 +147,5 @@ if drug_selections and role in ["Doctor", "Pharmacist"]:
     df.reset_index(drop=True, inplace=True)
     df.insert(0, "Sr. No.", range(1, len(df)+1))
     st.dataframe(df)
+
+show_chart_metrics(chart_cache)
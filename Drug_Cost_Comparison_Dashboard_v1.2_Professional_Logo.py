@@ -1,8 +1,12 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import random
+from chart_cache import price_bar_chart, shared_chart_cache, show_chart_metrics
+from catalog_provider import cached_catalog, shared_resource
+from condition_index import ConditionIndex
+from drug_catalog import DrugCatalog
+from static_assets import show_image
+from synthetic_prices import BRAND_STREAM, GENERIC_STREAM, SyntheticPriceModel
 
 # Synthetic drug data with medical conditions
 drug_data = {
@@ -50,16 +54,27 @@ suitability_indicators = {
 }
 
 pharmacies = ["PharmaOne", "HealthPlus", "MediCare"]
+chart_cache = shared_chart_cache()
+price_model = SyntheticPriceModel(seed=2024)
+
+catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data, pharmacies)
+condition_index = shared_resource(ConditionIndex, catalog)
 
 # Sidebar for role selection
 st.set_page_config(layout="wide")
-st.sidebar.image("https://upload.wikimedia.org/wikipedia/commons/5/5e/Professional_icon.png", width=100)
+show_image("professional_icon.svg", width=100, container=st.sidebar)
 st.sidebar.title("🔐 User Role")
 role = st.sidebar.selectbox("Select your role", ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"])
 
+# Sidebar for condition-first browsing
+st.sidebar.title("🩺 Browse by Condition")
+condition = st.sidebar.selectbox("Select Condition", ["All Conditions"] + condition_index.conditions())
+condition_drugs = list(drug_data.keys()) if condition == "All Conditions" else \
+    list(dict.fromkeys(condition_index.drugs_for(condition)["Drug"]))
+
 # Sidebar for drug selection
 st.sidebar.title("💊 Drug Selection")
-selected_drugs = st.sidebar.multiselect("Select Drugs", list(drug_data.keys()))
+selected_drugs = st.sidebar.multiselect("Select Drugs", condition_drugs)
 
 drug_selections = {}
 for drug in selected_drugs:
@@ -69,22 +84,28 @@ for drug in selected_drugs:
 st.markdown("<h1 style='text-align: center; color: navy;'>Integrated Drug Cost Comparison Dashboard</h1>", unsafe_allow_html=True)
 st.markdown("---")
 
+# Condition overview: every drug for the selected condition, cheapest generic first
+if condition != "All Conditions":
+    st.subheader(f"🩺 {condition} Drugs by Lowest Generic Price")
+    df_condition = condition_index.drugs_for(condition)
+    df_condition.insert(0, "Sr. No.", range(1, len(df_condition) + 1))
+    st.dataframe(df_condition)
+
 # Price Comparison Table
 if drug_selections and role in ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"]:
     st.subheader("💊 Price Comparison Across Pharmacies")
-    comparison_rows = []
-    for drug, dosage in drug_selections.items():
-        for pharmacy in pharmacies:
-            generic_price = drug_data[drug]["generic_price"] + random.randint(-2, 2)
-            brand_price = drug_data[drug]["brand_price"] + random.randint(-5, 5)
-            comparison_rows.append({
-                "Drug": f"{drug} ({drug_data[drug]['condition']})",
-                "Dosage": dosage,
-                "Pharmacy": pharmacy,
-                "Generic Price ($)": generic_price,
-                "Brand Price ($)": brand_price
-            })
-    df_comparison = pd.DataFrame(comparison_rows)
+    # Seeded per (drug, pharmacy) variation, so prices stay put across reruns
+    rows = catalog.selection(drug_selections)
+    drug_codes, pharmacy_codes = catalog.drug[rows], catalog.pharmacy[rows]
+    df_comparison = pd.DataFrame({
+        "Drug": [f"{drug} ({drug_data[drug]['condition']})" for drug in catalog.drugs.decode(drug_codes)],
+        "Dosage": catalog.dosages.decode(catalog.dosage[rows]),
+        "Pharmacy": catalog.pharmacies.decode(pharmacy_codes),
+        "Generic Price ($)": catalog.generic_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -2, 2, stream=GENERIC_STREAM),
+        "Brand Price ($)": catalog.brand_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -5, 5, stream=BRAND_STREAM),
+    })
     df_comparison.reset_index(drop=True, inplace=True)
     df_comparison.insert(0, "Sr. No.", range(1, len(df_comparison) + 1))
     st.dataframe(df_comparison)
@@ -95,11 +116,7 @@ if drug_selections and role in ["Patient", "Doctor", "Pharmacist"]:
     for drug in drug_selections:
         generic = drug_data[drug]["generic_price"]
         brand = drug_data[drug]["brand_price"]
-        fig, ax = plt.subplots()
-        ax.bar(["Generic", "Brand"], [generic, brand], color=["green", "red"])
-        ax.set_title(f"{drug} ({drug_data[drug]['condition']}) Price Comparison")
-        ax.set_ylabel("Price ($)")
-        st.pyplot(fig)
+        st.image(price_bar_chart(chart_cache, f"{drug} ({drug_data[drug]['condition']}) Price Comparison", generic, brand))
 
 # Savings Estimator
 if drug_selections and role in ["Patient", "Insurance Analyst"]:
@@ -179,3 +196,5 @@ if drug_selections and role in ["Doctor", "Pharmacist"]:
         df_alt.reset_index(drop=True, inplace=True)
         df_alt.insert(0, "Sr. No.", range(1, len(df_alt) + 1))
         st.dataframe(df_alt)
+
+show_chart_metrics(chart_cache)
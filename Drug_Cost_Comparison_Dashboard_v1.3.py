@@ -1,8 +1,12 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import random
+from catalog_provider import cached_catalog
+from chart_cache import price_bar_chart, shared_chart_cache, show_chart_metrics
+from drug_catalog import DrugCatalog
+from side_effect_screen import SideEffectScreen
+from static_assets import img_tag
+from synthetic_prices import BRAND_STREAM, GENERIC_STREAM, SyntheticPriceModel
 
 # Synthetic drug data with side effects
 drug_data = {
@@ -47,7 +51,20 @@ therapeutic_alternatives = {
     "Amlodipine": [("Nifedipine", 10), ("Felodipine", 12)]
 }
 
+# Synthetic drug-drug interactions: (drug, drug) -> (severity, note)
+drug_interactions = {
+    ("Lisinopril", "Amlodipine"): ("Moderate", "Additive blood pressure lowering; monitor for dizziness"),
+    ("Atorvastatin", "Amlodipine"): ("Minor", "Amlodipine may raise atorvastatin levels"),
+    ("Metformin", "Lisinopril"): ("Minor", "May increase risk of low blood sugar")
+}
+
 pharmacies = ["PharmaOne", "HealthPlus", "MediCare"]
+catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data, pharmacies)
+chart_cache = shared_chart_cache()
+price_model = SyntheticPriceModel(seed=2024)
+
+side_effect_screen = SideEffectScreen({drug: data["side_effects"] for drug, data in drug_data.items()},
+                                      drug_interactions)
 
 # Sidebar for role selection
 st.sidebar.title("🔐 User Role")
@@ -64,24 +81,23 @@ for drug in selected_drugs:
 
 # Professional header
 st.markdown("<h1 style='text-align: center; color: navy;'>Integrated Drug Cost Comparison Dashboard</h1>", unsafe_allow_html=True)
-st.markdown("<p style='text-align: center;'><img src='https://upload.wikimedia.org/wikipedia/commons/thumb/1/1e/Pharmacy_icon.svg/1024px-Pharmacy_icon.svg.png' width='80'></p>", unsafe_allow_html=True)
+st.markdown(f"<p style='text-align: center;'>{img_tag('pharmacy_icon.svg', 80)}</p>", unsafe_allow_html=True)
 
 # Price Comparison Table
 if drug_selections and role in ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"]:
     st.subheader("💊 Price Comparison Across Pharmacies")
-    comparison_rows = []
-    for drug, dosage in drug_selections.items():
-        for pharmacy in pharmacies:
-            generic_price = drug_data[drug]["generic_price"] + random.randint(-2, 2)
-            brand_price = drug_data[drug]["brand_price"] + random.randint(-5, 5)
-            comparison_rows.append({
-                "Drug": drug,
-                "Dosage": dosage,
-                "Pharmacy": pharmacy,
-                "Generic Price ($)": generic_price,
-                "Brand Price ($)": brand_price
-            })
-    df_comparison = pd.DataFrame(comparison_rows)
+    # Seeded per (drug, pharmacy) variation, so prices stay put across reruns
+    rows = catalog.selection(drug_selections)
+    drug_codes, pharmacy_codes = catalog.drug[rows], catalog.pharmacy[rows]
+    df_comparison = pd.DataFrame({
+        "Drug": catalog.drugs.decode(drug_codes),
+        "Dosage": catalog.dosages.decode(catalog.dosage[rows]),
+        "Pharmacy": catalog.pharmacies.decode(pharmacy_codes),
+        "Generic Price ($)": catalog.generic_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -2, 2, stream=GENERIC_STREAM),
+        "Brand Price ($)": catalog.brand_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -5, 5, stream=BRAND_STREAM),
+    })
     df_comparison.reset_index(drop=True, inplace=True)
     df_comparison.insert(0, "Sr. No.", range(1, len(df_comparison) + 1))
     st.dataframe(df_comparison)
@@ -92,11 +108,7 @@ if drug_selections and role in ["Patient", "Doctor", "Pharmacist"]:
     for drug in drug_selections:
         generic = drug_data[drug]["generic_price"]
         brand = drug_data[drug]["brand_price"]
-        fig, ax = plt.subplots()
-        ax.bar(["Generic", "Brand"], [generic, brand], color=["green", "red"])
-        ax.set_title(f"{drug} Price Comparison")
-        ax.set_ylabel("Price ($)")
-        st.pyplot(fig)
+        st.image(price_bar_chart(chart_cache, f"{drug} Price Comparison", generic, brand))
 
 # Savings Estimator
 if drug_selections and role in ["Patient", "Insurance Analyst"]:
@@ -136,6 +148,22 @@ if drug_selections and role in ["Doctor", "Pharmacist"]:
         df_alt.insert(0, "Sr. No.", range(1, len(df_alt) + 1))
         st.dataframe(df_alt)
 
+# Regimen Screening for overlapping side effects and interactions
+if drug_selections and role in ["Doctor", "Pharmacist"]:
+    st.subheader("🔍 Regimen Screening")
+    df_overlap = side_effect_screen.overlapping_effects(drug_selections)
+    df_interactions = side_effect_screen.interactions(drug_selections)
+    if df_overlap.empty and df_interactions.empty:
+        st.caption("No overlapping side effects or interactions found for the selected regimen.")
+    if not df_overlap.empty:
+        st.markdown("**Overlapping Side Effects:**")
+        df_overlap.insert(0, "Sr. No.", range(1, len(df_overlap) + 1))
+        st.dataframe(df_overlap)
+    if not df_interactions.empty:
+        st.markdown("**Drug Interactions:**")
+        df_interactions.insert(0, "Sr. No.", range(1, len(df_interactions) + 1))
+        st.dataframe(df_interactions)
+
 # Side Effect Awareness for Patients
 if drug_selections and role == "Patient":
     st.subheader("⚠️ Side Effect Awareness")
@@ -144,3 +172,5 @@ if drug_selections and role == "Patient":
         st.markdown(f"**Common Side Effects for {drug}:**")
         for effect in side_effects:
             st.markdown(f"- {effect}")
+
+show_chart_metrics(chart_cache)
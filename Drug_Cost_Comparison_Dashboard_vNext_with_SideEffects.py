@@ -1,7 +1,19 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import random
+import numpy as np
+from benefit_engine import BenefitPlans
+from catalog_provider import cached_catalog, data_version, shared_resource
+from chart_cache import price_bar_chart, shared_chart_cache, show_chart_metrics
+from condition_index import conditions_from_names
+from drug_catalog import DrugCatalog
+from drug_search import DrugSearch
+from efficacy_rank import EfficacyRanking
+from paged_table import ColumnarTable, paged_dataframe
+from savings_cube import DIMENSION_TITLES, DIMENSIONS, SavingsCube
+from side_effect_screen import SideEffectScreen
+from static_assets import show_image
+from synthetic_prices import BRAND_STREAM, GENERIC_STREAM, VOLUME_STREAM, SyntheticPriceModel
+from therapeutic_index import AlternativeIndex
 
 # Synthetic drug data with medical conditions
 drug_data = {
@@ -12,6 +24,15 @@ drug_data = {
     "Amlodipine (Blood Pressure)": {"dosages": ["5mg", "10mg"], "generic_price": 11, "brand_price": 32}
 }
 
+# Synthetic brand names used as search synonyms
+brand_names = {
+    "Atorvastatin (Cholesterol)": ["Lipitor"],
+    "Lisinopril (Blood Pressure)": ["Prinivil", "Zestril"],
+    "Metformin (Diabetes)": ["Glucophage"],
+    "Omeprazole (Acid Reflux)": ["Prilosec"],
+    "Amlodipine (Blood Pressure)": ["Norvasc"]
+}
+
 # Synthetic therapeutic alternatives
 therapeutic_alternatives = {
     "Atorvastatin (Cholesterol)": [("Simvastatin", 12), ("Rosuvastatin", 18)],
@@ -30,6 +51,15 @@ efficacy_scores = {
     "Amlodipine (Blood Pressure)": 8.2
 }
 
+# Synthetic efficacy scores for the therapeutic alternatives (value ranking and comparable alternatives)
+alternative_efficacy_scores = {
+    "Simvastatin": 7.8, "Rosuvastatin": 8.8,
+    "Enalapril": 7.8, "Ramipril": 8.1,
+    "Glipizide": 7.9, "Glyburide": 7.4,
+    "Pantoprazole": 7.6, "Esomeprazole": 7.9,
+    "Nifedipine": 7.7, "Felodipine": 7.9
+}
+
 suitability_indicators = {
     "Atorvastatin (Cholesterol)": "✔️ Suitable for adults, caution in liver disease",
     "Lisinopril (Blood Pressure)": "✔️ Not recommended during pregnancy",
@@ -47,6 +77,13 @@ side_effects = {
     "Amlodipine (Blood Pressure)": ["Swelling", "Fatigue", "Flushing"]
 }
 
+# Synthetic drug-drug interactions: (drug, drug) -> (severity, note)
+drug_interactions = {
+    ("Lisinopril (Blood Pressure)", "Amlodipine (Blood Pressure)"): ("Moderate", "Additive blood pressure lowering; monitor for dizziness"),
+    ("Atorvastatin (Cholesterol)", "Amlodipine (Blood Pressure)"): ("Minor", "Amlodipine may raise atorvastatin levels"),
+    ("Metformin (Diabetes)", "Lisinopril (Blood Pressure)"): ("Minor", "May increase risk of low blood sugar")
+}
+
 # Synthetic insurance coverage data
 insurance_coverage = {
     "Atorvastatin (Cholesterol)": 0.8,
@@ -56,130 +93,330 @@ insurance_coverage = {
     "Amlodipine (Blood Pressure)": 0.78
 }
 
+# Synthetic pharmacy benefit designs (annual deductible and OOP max, per-tier cost share)
+benefit_plans = {
+    "Bronze": {"deductible": 500, "oop_max": 4000, "generic": {"copay": 15}, "brand": {"coinsurance": 0.4}},
+    "Silver": {"deductible": 250, "oop_max": 3000, "generic": {"copay": 10}, "brand": {"coinsurance": 0.3}},
+    "Gold": {"deductible": 0, "oop_max": 2000, "generic": {"copay": 5}, "brand": {"copay": 40}}
+}
+
 pharmacies = ["PharmaOne", "HealthPlus", "MediCare"]
 
+# Synthetic pharmacy regions for the savings cube
+pharmacy_regions = {"PharmaOne": "Northeast", "HealthPlus": "Midwest", "MediCare": "South"}
+
+
+def build_savings_cube(catalog, benefit_plans, pharmacy_regions, seed):
+    volume = SyntheticPriceModel(seed=seed).integers(catalog.drug, catalog.pharmacy, 20, 200, stream=VOLUME_STREAM)
+    cube = SavingsCube(catalog, BenefitPlans(benefit_plans), pharmacy_regions, volume=volume)
+    cube.inputs = data_version(benefit_plans, pharmacy_regions, seed)
+    return cube
+
+
+def reprice_savings_cube(cube, catalog, benefit_plans, pharmacy_regions, seed):
+    # A new catalog version with the same plans, regions and volumes only needs its changed prices applied
+    return cube.inputs == data_version(benefit_plans, pharmacy_regions, seed) and cube.reprice(catalog)
+
+
+catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data, pharmacies, conditions_from_names(drug_data))
+list_generic, list_brand = catalog.drug_price_summary()
+drug_search = shared_resource(DrugSearch.from_catalog, catalog, brand_names)
+benefits = BenefitPlans(benefit_plans)
+price_model = SyntheticPriceModel(seed=2024)
+chart_cache = shared_chart_cache()
+alternative_index = shared_resource(AlternativeIndex.from_catalog, catalog, therapeutic_alternatives,
+                                    {**alternative_efficacy_scores, **efficacy_scores})
+efficacy_ranking = shared_resource(EfficacyRanking.from_catalog, catalog, alternative_index,
+                                   {**alternative_efficacy_scores, **efficacy_scores})
+side_effect_screen = SideEffectScreen(side_effects, drug_interactions)
+savings_cube = shared_resource(build_savings_cube, catalog, benefit_plans, pharmacy_regions, price_model.seed,
+                               update=reprice_savings_cube)
+
 st.set_page_config(layout="wide")
-st.image("https://upload.wikimedia.org/wikipedia/commons/4/4e/Cognizant_logo_2022.svg", width=200)
+show_image("brand_logo.svg", width=200)
 st.title("Integrated Drug Cost Comparison Dashboard")
 
 # Sidebar for drug selection
 st.sidebar.title("💊 Drug Selection")
-selected_drugs = st.sidebar.multiselect("Select Drugs", list(drug_data.keys()))
-drug_selections = {}
-for drug in selected_drugs:
-    dosage = st.sidebar.selectbox(f"Select Dosage for {drug}", drug_data[drug]["dosages"], key=drug)
-    drug_selections[drug] = dosage
+drug_query = st.sidebar.text_input("Search Drugs (generic or brand)", "")
+drug_matches = drug_search.search(drug_query, limit=20) if drug_query else catalog.drug_names()[:20]
+drug_options = list(dict.fromkeys(st.session_state.get("selected_drugs", []) + drug_matches))
+selected_drugs = tuple(st.sidebar.multiselect("Select Drugs", drug_options, key="selected_drugs"))
 
-# Tabs for each role
-tabs = st.tabs(["Patient", "Doctor", "Pharmacist", "Insurance Analyst"])
-roles = ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"]
+# Dashboard sections and the roles that see them, in tab order. Each section is a
+# fragment that takes its inputs explicitly (the selected drugs) and draws into its
+# slot in every role tab, so its dataset is built once per run and a widget inside
+# it (a dosage selector, a paging control) reruns only that section. Only the
+# price table depends on the per-drug dosages; everything else depends on which
+# drugs are selected, which is a full rerun.
+SECTION_ROLES = {
+    "prices": ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"],
+    "charts": ["Patient", "Doctor", "Pharmacist"],
+    "savings": ["Patient", "Insurance Analyst"],
+    "projection": ["Insurance Analyst"],
+    "cube": ["Insurance Analyst"],
+    "coverage": ["Patient"],
+    "alternatives": ["Doctor", "Pharmacist"],
+    "ranking": ["Doctor"],
+    "screening": ["Doctor", "Pharmacist"],
+    "efficacy": ["Doctor", "Patient"],
+    "side_effects": ["Patient"],
+}
+# Sections shown even before any drug is selected
+DRUG_FREE_SECTIONS = {"cube", "ranking"}
 
-for tab, role in zip(tabs, roles):
-    with tab:
-        st.header(f"{role} View")
 
-        if drug_selections:
+@st.fragment
+def price_section(drugs, slots):
+    # Dosage selectors (drawn into the sidebar) and the price table they drive
+    drug_selections = {}
+    for drug in drugs:
+        drug_selections[drug] = st.sidebar.selectbox(f"Select Dosage for {drug}", catalog.dosages_for(drug), key=drug)
+    rows = catalog.selection(drug_selections)
+    drug_codes, pharmacy_codes = catalog.drug[rows], catalog.pharmacy[rows]
+    comparison_table = ColumnarTable({
+        "Drug": (drug_codes, catalog.drugs),
+        "Dosage": (catalog.dosage[rows], catalog.dosages),
+        "Pharmacy": (pharmacy_codes, catalog.pharmacies),
+        "Generic Price ($)": catalog.generic_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -2, 2, stream=GENERIC_STREAM),
+        "Brand Price ($)": catalog.brand_price[rows] + price_model.integers(
+            drug_codes, pharmacy_codes, -5, 5, stream=BRAND_STREAM),
+    })
+    for role, slot in slots.items():
+        with slot:
             st.subheader("💊 Price Comparison Across Pharmacies")
-            comparison_rows = []
-            for drug, dosage in drug_selections.items():
-                for pharmacy in pharmacies:
-                    generic_price = drug_data[drug]["generic_price"] + random.randint(-2, 2)
-                    brand_price = drug_data[drug]["brand_price"] + random.randint(-5, 5)
-                    comparison_rows.append({
-                        "Drug": drug,
-                        "Dosage": dosage,
-                        "Pharmacy": pharmacy,
-                        "Generic Price ($)": generic_price,
-                        "Brand Price ($)": brand_price
-                    })
-            df_comparison = pd.DataFrame(comparison_rows)
-            df_comparison.insert(0, "Sr. No.", range(1, len(df_comparison) + 1))
-            st.dataframe(df_comparison)
-
-        if drug_selections and role in ["Patient", "Doctor", "Pharmacist"]:
+            paged_dataframe(comparison_table, key=f"comparison_{role}", filterable=["Drug", "Pharmacy"])
+
+
+@st.fragment
+def chart_section(drugs, slots):
+    price_charts = {}
+    for drug in drugs:
+        generic = list_generic[catalog.drugs.code(drug)]
+        brand = list_brand[catalog.drugs.code(drug)]
+        price_charts[drug] = price_bar_chart(chart_cache, f"{drug} Price Comparison", generic, brand)
+    for slot in slots.values():
+        with slot:
             st.subheader("📊 Generic vs Brand Price Comparison")
-            for drug in drug_selections:
-                generic = drug_data[drug]["generic_price"]
-                brand = drug_data[drug]["brand_price"]
-                fig, ax = plt.subplots()
-                ax.bar(["Generic", "Brand"], [generic, brand], color=["green", "red"])
-                ax.set_title(f"{drug} Price Comparison")
-                ax.set_ylabel("Price ($)")
-                st.pyplot(fig)
-
-        if drug_selections and role in ["Patient", "Insurance Analyst"]:
+            for drug in drugs:
+                st.image(price_charts[drug])
+
+
+@st.fragment
+def savings_section(drugs, slots):
+    savings_rows = []
+    for drug in drugs:
+        generic = list_generic[catalog.drugs.code(drug)]
+        brand = list_brand[catalog.drugs.code(drug)]
+        monthly_savings = brand - generic
+        annual_savings = monthly_savings * 12
+        savings_rows.append({
+            "Drug": drug,
+            "Monthly Savings ($)": monthly_savings,
+            "Annual Savings ($)": annual_savings
+        })
+    df_savings = pd.DataFrame(savings_rows)
+    df_savings.insert(0, "Sr. No.", range(1, len(df_savings) + 1))
+    for slot in slots.values():
+        with slot:
             st.subheader("💰 Estimated Savings")
-            savings_rows = []
-            for drug in drug_selections:
-                generic = drug_data[drug]["generic_price"]
-                brand = drug_data[drug]["brand_price"]
-                monthly_savings = brand - generic
-                annual_savings = monthly_savings * 12
-                savings_rows.append({
-                    "Drug": drug,
-                    "Monthly Savings ($)": monthly_savings,
-                    "Annual Savings ($)": annual_savings
-                })
-            df_savings = pd.DataFrame(savings_rows)
-            df_savings.insert(0, "Sr. No.", range(1, len(df_savings) + 1))
             st.dataframe(df_savings)
 
-        if drug_selections and role == "Patient":
+
+@st.fragment
+def projection_section(drugs, slots):
+    codes = catalog.drugs.codes(list(drugs))
+    regimen_cents = np.rint(np.array([list_generic[codes].sum(), list_brand[codes].sum()]) * 100)
+    for role, slot in slots.items():
+        with slot:
+            st.subheader("📆 Annual Cost Projection by Plan")
+            n_members = st.number_input("Members on this regimen", min_value=1, max_value=200000, value=10000,
+                                        step=1000, key=f"members_{role}")
+            # Seeded monthly adherence: each member fills the regimen in ~90% of months
+            fills = np.random.default_rng(0).random((n_members, 12)) < 0.9
+            generic_fills = np.stack([fills * regimen_cents[0], np.zeros_like(fills)], axis=2)
+            brand_fills = np.stack([np.zeros_like(fills), fills * regimen_cents[1]], axis=2)
+            generic_projection = benefits.simulate(generic_fills)
+            brand_projection = benefits.simulate(brand_fills)
+            df_projection = pd.DataFrame({
+                "Plan": benefits.plan_names(),
+                "Avg Member Cost, Generic ($)": generic_projection.member_annual.mean(axis=1) / 100,
+                "Avg Member Cost, Brand ($)": brand_projection.member_annual.mean(axis=1) / 100,
+                "Avg Plan Cost, Generic ($)": generic_projection.plan_annual.mean(axis=1) / 100,
+                "Avg Plan Cost, Brand ($)": brand_projection.plan_annual.mean(axis=1) / 100,
+                "Members at OOP Max, Brand (%)": brand_projection.hit_oop_max.mean(axis=1) * 100
+            }).round(2)
+            df_projection.insert(0, "Sr. No.", range(1, len(df_projection) + 1))
+            st.dataframe(df_projection)
+
+
+@st.fragment
+def cube_section(drugs, slots):
+    for role, slot in slots.items():
+        with slot:
+            st.subheader("🧊 Book-Wide Savings Explorer")
+            cube_by = st.multiselect("Group by", DIMENSIONS, default=["condition"],
+                                     format_func=DIMENSION_TITLES.get, key=f"cube_by_{role}")
+            cube_plans = st.multiselect("Plans", benefits.plan_names(), default=benefits.plan_names(),
+                                        key=f"cube_plans_{role}")
+            df_cube = savings_cube.query(by=cube_by, where={"plan": cube_plans})
+            df_cube["Annual Member Savings ($)"] = df_cube["Member Savings ($)"] * 12
+            df_cube["Annual Plan Savings ($)"] = df_cube["Plan Savings ($)"] * 12
+            df_cube = df_cube.round(2)
+            df_cube.insert(0, "Sr. No.", range(1, len(df_cube) + 1))
+            st.dataframe(df_cube)
+
+
+@st.fragment
+def coverage_section(drugs, slots):
+    coverage_rows = []
+    for drug in drugs:
+        coverage = insurance_coverage.get(drug, 0.7)
+        generic_price = float(list_generic[catalog.drugs.code(drug)])
+        brand_price = float(list_brand[catalog.drugs.code(drug)])
+        generic_covered = round(generic_price * coverage, 2)
+        brand_covered = round(brand_price * coverage, 2)
+        generic_copay = round(generic_price - generic_covered, 2)
+        brand_copay = round(brand_price - brand_covered, 2)
+        coverage_rows.append({
+            "Drug": drug,
+            "Coverage %": f"{int(coverage * 100)}%",
+            "Generic Covered ($)": generic_covered,
+            "Generic Co-pay ($)": generic_copay,
+            "Brand Covered ($)": brand_covered,
+            "Brand Co-pay ($)": brand_copay
+        })
+    df_coverage = pd.DataFrame(coverage_rows)
+    df_coverage.insert(0, "Sr. No.", range(1, len(df_coverage) + 1))
+    for slot in slots.values():
+        with slot:
             st.subheader("🛡️ Insurance Coverage Estimator")
-            coverage_rows = []
-            for drug in drug_selections:
-                coverage = insurance_coverage.get(drug, 0.7)
-                generic_price = drug_data[drug]["generic_price"]
-                brand_price = drug_data[drug]["brand_price"]
-                generic_covered = round(generic_price * coverage, 2)
-                brand_covered = round(brand_price * coverage, 2)
-                generic_copay = round(generic_price - generic_covered, 2)
-                brand_copay = round(brand_price - brand_covered, 2)
-                coverage_rows.append({
-                    "Drug": drug,
-                    "Coverage %": f"{int(coverage * 100)}%",
-                    "Generic Covered ($)": generic_covered,
-                    "Generic Co-pay ($)": generic_copay,
-                    "Brand Covered ($)": brand_covered,
-                    "Brand Co-pay ($)": brand_copay
-                })
-            df_coverage = pd.DataFrame(coverage_rows)
-            df_coverage.insert(0, "Sr. No.", range(1, len(df_coverage) + 1))
             st.dataframe(df_coverage)
 
-        if drug_selections and role in ["Doctor", "Pharmacist"]:
+
+@st.fragment
+def alternatives_section(drugs, slots):
+    alternative_views = []
+    for drug in drugs:
+        original_price = alternative_index.price[drug]
+        alt_rows = [{
+            "Alternative Drug": alt_drug,
+            "Synthetic Price ($)": alt_price,
+            "Estimated Savings ($)": original_price - alt_price
+        } for alt_drug, alt_price, _ in alternative_index.alternatives(drug)]
+        cheapest_alt = alternative_index.cheapest_alternative(drug, min_efficacy=efficacy_scores.get(drug))
+        alt_caption = None
+        if cheapest_alt and cheapest_alt[1] < original_price:
+            alt_caption = (f"Cheapest comparable alternative: {cheapest_alt[0]} "
+                           f"(saves ${original_price - cheapest_alt[1]:.2f})")
+        df_alt = pd.DataFrame(alt_rows)
+        df_alt.insert(0, "Sr. No.", range(1, len(df_alt) + 1))
+        alternative_views.append((drug, alt_caption, df_alt))
+    for slot in slots.values():
+        with slot:
             st.subheader("🧠 Therapeutic Alternatives Suggestion")
-            for drug in drug_selections:
+            for drug, alt_caption, df_alt in alternative_views:
                 st.markdown(f"**Alternatives for {drug}:**")
-                alt_rows = []
-                original_price = drug_data[drug]["generic_price"]
-                for alt_drug, alt_price in therapeutic_alternatives.get(drug, []):
-                    savings = original_price - alt_price
-                    alt_rows.append({
-                        "Alternative Drug": alt_drug,
-                        "Synthetic Price ($)": alt_price,
-                        "Estimated Savings ($)": savings
-                    })
-                df_alt = pd.DataFrame(alt_rows)
-                df_alt.insert(0, "Sr. No.", range(1, len(df_alt) + 1))
+                if alt_caption:
+                    st.caption(alt_caption)
                 st.dataframe(df_alt)
 
-        if drug_selections and role in ["Doctor", "Patient"]:
+
+@st.fragment
+def ranking_section(drugs, slots):
+    condition_options = efficacy_ranking.conditions()
+    # Drugs without a condition (code -1) are not ranked, so they cannot pick the default condition
+    drug_conditions = catalog.drug_condition[[catalog.drugs.code(drug) for drug in drugs]]
+    first_condition = next((catalog.conditions.labels[code] for code in drug_conditions if code >= 0),
+                           condition_options[0])
+    for role, slot in slots.items():
+        with slot:
+            st.subheader("🏅 Best Value by Condition")
+            ranked_condition = st.selectbox("Condition", condition_options,
+                                            index=condition_options.index(first_condition), key=f"ranking_{role}")
+            df_ranking = efficacy_ranking.ranking(ranked_condition)
+            df_ranking["Suitability Notes"] = df_ranking["Drug"].map(suitability_indicators).fillna("N/A")
+            st.caption("Ranked by efficacy per dollar; Pareto-optimal options have no cheaper option "
+                       "that is at least as effective.")
+            st.dataframe(df_ranking, hide_index=True)
+
+
+@st.fragment
+def screening_section(drugs, slots):
+    df_overlap = side_effect_screen.overlapping_effects(drugs)
+    df_overlap.insert(0, "Sr. No.", range(1, len(df_overlap) + 1))
+    df_interactions = side_effect_screen.interactions(drugs)
+    df_interactions.insert(0, "Sr. No.", range(1, len(df_interactions) + 1))
+    for slot in slots.values():
+        with slot:
+            st.subheader("🔍 Regimen Screening")
+            if df_overlap.empty and df_interactions.empty:
+                st.caption("No overlapping side effects or interactions found for the selected regimen.")
+            if not df_overlap.empty:
+                st.markdown("**Overlapping Side Effects:**")
+                st.dataframe(df_overlap)
+            if not df_interactions.empty:
+                st.markdown("**Drug Interactions:**")
+                st.dataframe(df_interactions)
+
+
+@st.fragment
+def efficacy_section(drugs, slots):
+    info_rows = []
+    for drug in drugs:
+        info_rows.append({
+            "Drug": drug,
+            "Efficacy Score (1-10)": efficacy_scores.get(drug, "N/A"),
+            "Suitability Notes": suitability_indicators.get(drug, "N/A")
+        })
+    df_info = pd.DataFrame(info_rows)
+    df_info.insert(0, "Sr. No.", range(1, len(df_info) + 1))
+    for slot in slots.values():
+        with slot:
             st.subheader("📈 Clinical Efficacy & Suitability")
-            info_rows = []
-            for drug in drug_selections:
-                info_rows.append({
-                    "Drug": drug,
-                    "Efficacy Score (1-10)": efficacy_scores.get(drug, "N/A"),
-                    "Suitability Notes": suitability_indicators.get(drug, "N/A")
-                })
-            df_info = pd.DataFrame(info_rows)
-            df_info.insert(0, "Sr. No.", range(1, len(df_info) + 1))
             st.dataframe(df_info)
 
-        if drug_selections and role == "Patient":
+
+@st.fragment
+def side_effects_section(drugs, slots):
+    for slot in slots.values():
+        with slot:
             st.subheader("⚠️ Common Side Effects")
-            for drug in drug_selections:
+            for drug in drugs:
                 effects = side_effects.get(drug, [])
                 if effects:
                     st.markdown(f"**{drug}:** {', '.join(effects)}")
+
+
+SECTIONS = {
+    "prices": price_section,
+    "charts": chart_section,
+    "savings": savings_section,
+    "projection": projection_section,
+    "cube": cube_section,
+    "coverage": coverage_section,
+    "alternatives": alternatives_section,
+    "ranking": ranking_section,
+    "screening": screening_section,
+    "efficacy": efficacy_section,
+    "side_effects": side_effects_section,
+}
+
+# Tabs for each role, with an empty slot per visible section
+tabs = st.tabs(["Patient", "Doctor", "Pharmacist", "Insurance Analyst"])
+roles = ["Patient", "Doctor", "Pharmacist", "Insurance Analyst"]
+visible = [section for section in SECTIONS if selected_drugs or section in DRUG_FREE_SECTIONS]
+slots = {section: {} for section in visible}
+
+for tab, role in zip(tabs, roles):
+    with tab:
+        st.header(f"{role} View")
+        for section in visible:
+            if role in SECTION_ROLES[section]:
+                slots[section][role] = st.container()
+
+for section in visible:
+    SECTIONS[section](selected_drugs, slots[section])
+
+show_chart_metrics(chart_cache)
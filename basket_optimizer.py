@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Cheapest way to fill a multi-drug regimen.
+# prices is an (n_drugs, n_pharmacies) array with NaN where a pharmacy does not
+# stock a drug. A split-fill plan picks a set S of pharmacies, fills every drug
+# at its cheapest pharmacy in S, and pays `penalty` for each pharmacy beyond the
+# first:  cost(S) = sum_d min_{p in S} prices[d, p] + penalty * (|S| - 1).
+# Small baskets are solved exactly with a DP over drug subsets; larger ones use
+# greedy add/drop local search.
+
+BasketPlan = namedtuple("BasketPlan", ["pharmacies", "assignment", "drug_cost", "penalty_cost", "total", "exact"])
+
+EXACT_DRUG_LIMIT = 10
+_UNSTOCKED = 1e12
+_PHARMACY_BLOCK = 1024
+
+
+def _dense(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.where(np.isnan(prices), _UNSTOCKED, prices)
+
+
+def _plan(prices, assignment, penalty, exact):
+    if len(assignment) and (prices[np.arange(len(assignment)), assignment] >= _UNSTOCKED).any():
+        return None
+    drug_cost = float(prices[np.arange(len(assignment)), assignment].sum())
+    pharmacies = list(dict.fromkeys(int(p) for p in assignment))
+    penalty_cost = penalty * max(len(pharmacies) - 1, 0)
+    return BasketPlan(pharmacies, assignment, round(drug_cost, 2), round(penalty_cost, 2),
+                      round(drug_cost + penalty_cost, 2), exact)
+
+
+def cheapest_single_pharmacy(prices):
+    # Best plan that fills the whole basket at one pharmacy, or None if no pharmacy stocks everything
+    prices = _dense(prices)
+    if not prices.size:
+        return None
+    best = int(np.argmin(prices.sum(axis=0)))
+    return _plan(prices, np.full(len(prices), best, dtype=np.int64), 0.0, True)
+
+
+def _subset_costs(prices):
+    # For every drug subset (bitmask), the cheapest single pharmacy and its total, scanning pharmacies in blocks
+    n_drugs, n_pharmacies = prices.shape
+    n_subsets = 1 << n_drugs
+    lowbit = np.arange(n_subsets) & -np.arange(n_subsets)
+    lowbit_drug = np.log2(np.maximum(lowbit, 1)).astype(np.int64)
+    best_cost = np.full(n_subsets, np.inf)
+    best_pharmacy = np.zeros(n_subsets, dtype=np.int64)
+    for start in range(0, n_pharmacies, _PHARMACY_BLOCK):
+        block = prices[:, start:start + _PHARMACY_BLOCK]
+        sums = np.zeros((n_subsets, block.shape[1]))
+        for mask in range(1, n_subsets):
+            sums[mask] = sums[mask ^ lowbit[mask]] + block[lowbit_drug[mask]]
+        block_best = np.argmin(sums, axis=1)
+        block_cost = sums[np.arange(n_subsets), block_best]
+        better = block_cost < best_cost
+        best_cost[better] = block_cost[better]
+        best_pharmacy[better] = block_best[better] + start
+    best_cost[0] = 0.0
+    return best_cost, best_pharmacy
+
+
+def _exact_split(prices, penalty):
+    n_drugs = len(prices)
+    subset_cost, subset_pharmacy = _subset_costs(prices)
+    full = (1 << n_drugs) - 1
+    best = np.full(full + 1, np.inf)
+    choice = np.zeros(full + 1, dtype=np.int64)
+    best[0] = -penalty
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        rest = mask ^ low
+        sub = rest
+        # Enumerate subsets of mask that contain its lowest drug
+        while True:
+            group = sub | low
+            cost = subset_cost[group] + penalty + best[mask ^ group]
+            if cost < best[mask]:
+                best[mask] = cost
+                choice[mask] = group
+            if sub == 0:
+                break
+            sub = (sub - 1) & rest
+
+    assignment = np.zeros(n_drugs, dtype=np.int64)
+    mask = full
+    while mask:
+        group = int(choice[mask])
+        pharmacy = subset_pharmacy[group]
+        for drug in range(n_drugs):
+            if group >> drug & 1:
+                assignment[drug] = pharmacy
+        mask ^= group
+    return assignment
+
+
+def _local_search(prices, penalty):
+    n_drugs, n_pharmacies = prices.shape
+    chosen = [int(np.argmin(prices.sum(axis=0)))]
+    current = prices[:, chosen[0]].copy()
+    while True:
+        # Add the pharmacy with the largest net saving
+        gains = np.maximum(current[:, None] - prices, 0).sum(axis=0) - penalty
+        gains[chosen] = -np.inf
+        candidate = int(np.argmax(gains))
+        if gains[candidate] > 1e-9:
+            chosen.append(candidate)
+            current = np.minimum(current, prices[:, candidate])
+            continue
+        # Drop any pharmacy whose removal saves more than its penalty costs
+        dropped = False
+        for pharmacy in list(chosen):
+            if len(chosen) == 1:
+                break
+            if pharmacy not in chosen:
+                continue
+            remaining = [p for p in chosen if p != pharmacy]
+            without = prices[:, remaining].min(axis=1)
+            if without.sum() - current.sum() < penalty - 1e-9:
+                chosen = remaining
+                current = without
+                dropped = True
+        if not dropped:
+            break
+    return np.asarray(chosen)[np.argmin(prices[:, chosen], axis=1)]
+
+
+def optimize_basket(prices, penalty=0.0, exact_limit=EXACT_DRUG_LIMIT):
+    # Cheapest split-fill plan, or None if some drug is not stocked anywhere
+    prices = _dense(prices)
+    if not prices.size:
+        return None
+    exact = len(prices) <= exact_limit
+    assignment = _exact_split(prices, penalty) if exact else _local_search(prices, penalty)
+    return _plan(prices, assignment, penalty, exact)
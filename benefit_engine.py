@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+import numpy as np
+
+from drug_catalog import Codebook
+
+# Year-long pharmacy benefit simulation, vectorized over plans x members.
+# Each month, each tier's allowed cost is applied in tier order: the member pays
+# toward the remaining deductible first, then the tier's copay (capped at the
+# remaining cost) or coinsurance, and never more than the remaining out-of-pocket
+# maximum. All amounts are integer cents; the accumulators are (plans, members)
+# arrays, so a 100k-member population is 12 x n_tiers array passes per plan set.
+
+TIERS = ("generic", "brand")
+NO_COPAY = -1
+
+BenefitProjection = namedtuple("BenefitProjection", ["member_monthly", "member_annual", "plan_annual", "hit_oop_max"])
+
+
+class BenefitPlans:
+    def __init__(self, plans, tiers=TIERS):
+        # plans: {name: {"deductible": $, "oop_max": $, "<tier>": {"copay": $} or {"coinsurance": fraction}}}
+        self.plans = Codebook(plans)
+        self.tiers = tuple(tiers)
+        n_plans, n_tiers = len(plans), len(self.tiers)
+        self.deductible = np.zeros(n_plans, dtype=np.int64)
+        self.oop_max = np.zeros(n_plans, dtype=np.int64)
+        self.copay = np.full((n_plans, n_tiers), NO_COPAY, dtype=np.int64)
+        self.coinsurance_bp = np.zeros((n_plans, n_tiers), dtype=np.int64)
+        for p, design in enumerate(plans.values()):
+            self.deductible[p] = round(design.get("deductible", 0) * 100)
+            self.oop_max[p] = round(design.get("oop_max", 1e9) * 100)
+            for t, tier in enumerate(self.tiers):
+                cost_share = design.get(tier, {})
+                if "copay" in cost_share:
+                    self.copay[p, t] = round(cost_share["copay"] * 100)
+                self.coinsurance_bp[p, t] = round(cost_share.get("coinsurance", 0) * 10000)
+
+    @classmethod
+    def from_coverage(cls, insurance_plans, tiers=TIERS):
+        # Flat coverage fractions ({"Plan A": 0.8}) as coinsurance-only plans with no deductible or OOP max
+        return cls({name: {tier: {"coinsurance": 1 - coverage} for tier in tiers}
+                    for name, coverage in insurance_plans.items()}, tiers=tiers)
+
+    def plan_names(self):
+        return list(self.plans.labels)
+
+    def member_share(self, cost_cents, tier):
+        # Member cost per fill once the deductible is met and before the OOP max: (plans,) + cost shape
+        cost = np.asarray(cost_cents, dtype=np.int64)
+        t = self.tiers.index(tier)
+        expand = (slice(None),) + (None,) * cost.ndim
+        copay = self.copay[:, t][expand]
+        coinsurance = (cost * self.coinsurance_bp[:, t][expand] + 5000) // 10000
+        return np.where(copay == NO_COPAY, coinsurance, np.minimum(copay, cost))
+
+    def simulate(self, monthly_cost_cents):
+        # monthly_cost_cents: (members, months, tiers) allowed cost per member, month and tier
+        costs = np.asarray(monthly_cost_cents, dtype=np.int64)
+        n_members, n_months, n_tiers = costs.shape
+        n_plans = len(self.plans)
+        deductible = self.deductible[:, None]
+        oop_max = self.oop_max[:, None]
+        deductible_paid = np.zeros((n_plans, n_members), dtype=np.int64)
+        oop_paid = np.zeros((n_plans, n_members), dtype=np.int64)
+        member_monthly = np.zeros((n_plans, n_members, n_months), dtype=np.int64)
+
+        for month in range(n_months):
+            for tier in range(n_tiers):
+                cost = costs[None, :, month, tier]
+                in_deductible = np.minimum(cost, deductible - deductible_paid)
+                remaining = cost - in_deductible
+                copay = self.copay[:, tier, None]
+                coinsurance = (remaining * self.coinsurance_bp[:, tier, None] + 5000) // 10000
+                after_deductible = np.where(copay == NO_COPAY, coinsurance, np.minimum(copay, remaining))
+                share = np.minimum(in_deductible + after_deductible, oop_max - oop_paid)
+                deductible_paid += np.minimum(in_deductible, share)
+                oop_paid += share
+                member_monthly[:, :, month] += share
+
+        member_annual = member_monthly.sum(axis=2)
+        plan_annual = costs.sum(axis=(1, 2))[None, :] - member_annual
+        return BenefitProjection(member_monthly, member_annual, plan_annual, oop_paid >= oop_max)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import streamlit as st
+
+# Process-wide catalog provider for the Streamlit apps.
+# The current catalog of each builder is shared by every session of the server
+# process through st.cache_resource; reruns only recompute the version key, and
+# building a new version replaces (and releases) the old one. File and directory sources are versioned by a digest of their
+# paths, sizes and modification times, in-memory sources by a digest of their
+# contents. Indexes derived from a catalog (search, alternatives, cubes) are
+# shared the same way through shared_resource, keyed by the catalog's version
+# plus a digest of their other inputs. A new version is built completely before it is returned, so each
+# rerun sees either the old catalog or the new one, never a mix. The arrays of
+# a shared catalog are made read-only so no session can modify them in place.
+
+
+def path_version(path):
+    # Digest of every file under path (or of path itself); "missing" when it does not exist
+    if not os.path.exists(path):
+        return "missing"
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    for name in files:
+        stat = os.stat(name)
+        digest.update(f"{os.path.relpath(name, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _version_key(value):
+    # Shared catalogs and resources stand for their version, anything else for its str()
+    return getattr(value, "version", None) or str(value)
+
+
+def data_version(*data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=_version_key).encode()).hexdigest()
+
+
+def freeze(catalog):
+    for value in vars(catalog).values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return catalog
+
+
+class LatestVersions:
+    # The newest value per name; a value built for a new version replaces the previous one
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+        self._values = {}
+
+    def get(self, name, version, build, update=None):
+        # update(value) may bring the current value to the new version in place; it returns False when it can't
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            value = self._values.get(name)
+            if value is not None and value.version != version and update is not None and update(value):
+                value.version = version
+            if value is None or value.version != version:
+                value = build()
+                value.version = version
+                self._values[name] = value
+            return value
+
+
+@st.cache_resource
+def latest_versions():
+    return LatestVersions()
+
+
+def _builder_name(build):
+    # Scripts all run as __main__, so functions are named by their source file
+    code = getattr(build, "__code__", None)
+    if code is not None:
+        return f"{code.co_filename}:{build.__qualname__}"
+    return f"{build.__module__}.{build.__qualname__}"
+
+
+def cached_catalog(build, *args, version=None):
+    # Shared catalog for build(*args); version defaults to a digest of args
+    if version is None:
+        version = data_version(*args)
+
+    def load():
+        with st.spinner("Loading drug catalog..."):
+            return freeze(build(*args))
+
+    return latest_versions().get(_builder_name(build), version, load)
+
+
+def shared_resource(build, *args, version=None, update=None):
+    # build(*args) shared by every session; rebuilt when a catalog in args or any other arg changes,
+    # unless update(value, *args) can bring the current value up to date in place.
+    # The result is shared, so sessions must not modify it.
+    if version is None:
+        version = data_version(*args)
+    apply = None if update is None else (lambda value: update(value, *args))
+    return latest_versions().get(_builder_name(build), version, lambda: build(*args), apply)
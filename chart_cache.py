@@ -0,0 +1,92 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import streamlit as st
+from matplotlib.figure import Figure
+
+# Rendered-chart cache for the dashboards.
+# Charts are drawn on standalone matplotlib Figures (never registered with
+# pyplot, so nothing accumulates in its global figure registry), rendered once
+# to PNG or SVG bytes and kept in a process-wide LRU keyed by what the chart
+# shows: (chart name, data, style). Reruns and other sessions showing the same
+# chart get the cached bytes and draw nothing.
+
+PRICE_BAR_STYLE = (("colors", ("green", "red")), ("figsize", (6.4, 4.8)), ("dpi", 100))
+
+
+class ChartCache:
+    def __init__(self, max_entries=256, fmt="png"):
+        self.max_entries = max_entries
+        self.fmt = fmt
+        self._charts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, key, draw, figsize=(6.4, 4.8), dpi=100):
+        # Bytes for the chart `draw(fig)` produces; `key` must identify everything it draws
+        key = hashlib.sha256(repr((key, figsize, dpi, self.fmt)).encode()).hexdigest()
+        with self._lock:
+            image = self._charts.get(key)
+            if image is not None:
+                self._charts.move_to_end(key)
+                self.hits += 1
+                return image
+        fig = Figure(figsize=figsize, dpi=dpi)
+        try:
+            draw(fig)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=self.fmt, bbox_inches="tight")
+        finally:
+            fig.clear()
+        image = buffer.getvalue()
+        with self._lock:
+            self.misses += 1
+            self._charts[key] = image
+            while len(self._charts) > self.max_entries:
+                self._charts.popitem(last=False)
+                self.evictions += 1
+        return image
+
+    def stats(self):
+        with self._lock:
+            return {"charts": len(self._charts), "bytes": sum(map(len, self._charts.values())),
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def live_figure_count():
+    # Figures held by pyplot's registry; should stay flat when charts go through ChartCache
+    return len(plt.get_fignums())
+
+
+@st.cache_resource
+def shared_chart_cache(max_entries=256, fmt="png"):
+    return ChartCache(max_entries, fmt)
+
+
+def price_bar_chart(cache, title, generic, brand, style=PRICE_BAR_STYLE):
+    # Generic vs brand bar chart used by the role dashboards
+    options = dict(style)
+
+    def draw(fig):
+        ax = fig.subplots()
+        ax.bar(["Generic", "Brand"], [generic, brand], color=list(options["colors"]))
+        ax.set_title(title)
+        ax.set_ylabel("Price ($)")
+
+    return cache.render(("price_bar", title, float(generic), float(brand), style), draw,
+                        figsize=options["figsize"], dpi=options["dpi"])
+
+
+def show_chart_metrics(cache, container=st.sidebar):
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    with container.expander("⚙️ Chart Cache"):
+        st.metric("Live Figures", live_figure_count())
+        st.metric("Cached Charts", stats["charts"], help=f"{stats['bytes'] / 1024:.0f} KiB, "
+                                                          f"{stats['evictions']} evicted")
+        st.metric("Hit Rate", f"{stats['hits'] / lookups:.0%}" if lookups else "n/a")
@@ -0,0 +1,174 @@
+import argparse
+import io
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from drug_search import normalize
+from therapeutic_index import AlternativeIndex
+
+# Batch "what if" repricing of a claims extract.
+# Scenarios, using the dashboards' drug_data / therapeutic_alternatives semantics:
+#   generic      - every brand fill is repriced at the drug's generic price
+#   alternative  - every fill is repriced at the cheapest member of its
+#                  therapeutic class (the drug's own generic included)
+# The CSV is split into byte ranges aligned to line starts; each worker process
+# opens the file itself, parses only its range and returns per-drug integer-cent
+# sums, so the parent never parses claims and throughput scales with processes.
+# Ranges assume no quoted field contains a newline, as in flat claims extracts.
+#
+# Claims columns: drug, fill_type ("brand" or "generic"), optional quantity
+# (fills, default 1) and optional paid_amount (defaults to list price x quantity).
+
+REQUIRED_COLUMNS = ["drug", "fill_type"]
+MEASURES = ("claims", "brand_claims", "current_cost", "generic_cost", "alternative_cost")
+UNMATCHED = "(unmatched)"
+
+
+class ClaimsFormatError(ValueError):
+    pass
+
+
+class ClaimsPricer:
+    def __init__(self, drug_data, therapeutic_alternatives=None):
+        # drug_data[drug] -> {"generic_price": x, "brand_price": y, ...}, prices per fill
+        self.drug_names = list(drug_data)
+        generic = {drug: info["generic_price"] for drug, info in drug_data.items()}
+        index = AlternativeIndex(therapeutic_alternatives or {}, generic)
+        self.generic_cents = np.array([round(generic[drug] * 100) for drug in self.drug_names], dtype=np.int64)
+        self.brand_cents = np.array([round(drug_data[drug]["brand_price"] * 100) for drug in self.drug_names],
+                                    dtype=np.int64)
+        self.best_cents = np.array([round(min(price for _, price, _ in index.members(drug)) * 100)
+                                    if drug in index else self.generic_cents[code]
+                                    for code, drug in enumerate(self.drug_names)], dtype=np.int64)
+        self.best_cents = np.minimum(self.best_cents, self.generic_cents)
+
+        # Claims may name "Atorvastatin" for "Atorvastatin (Cholesterol)"; exact names win
+        self.lookup = {}
+        for code, drug in enumerate(self.drug_names):
+            self.lookup.setdefault(normalize(drug.split(" (")[0]), code)
+        for code, drug in enumerate(self.drug_names):
+            self.lookup[normalize(drug)] = code
+
+    def codes(self, names):
+        # Normalizes each distinct name once; missing names (factorized to -1) hit the trailing -1
+        inverse, uniques = pd.factorize(names)
+        mapped = np.array([self.lookup.get(normalize(name), -1) for name in uniques] + [-1], dtype=np.int64)
+        return mapped[inverse]
+
+    def reprice(self, claims):
+        # (measures, drugs + 1) integer sums for one claims frame; column 0 collects unmatched drugs
+        code = self.codes(claims["drug"])
+        matched = code >= 0
+        is_brand = claims["fill_type"].astype(str).str.strip().str.lower().eq("brand").to_numpy()
+        # Blank or non-numeric quantities count as one fill, like a missing quantity column
+        quantity = (pd.to_numeric(claims["quantity"], errors="coerce").fillna(1).to_numpy(dtype=np.int64)
+                    if "quantity" in claims else np.ones(len(claims), dtype=np.int64))
+        list_cents = np.where(is_brand, self.brand_cents[code], self.generic_cents[code]) * quantity
+        if "paid_amount" in claims:
+            current = np.rint(pd.to_numeric(claims["paid_amount"], errors="coerce").to_numpy() * 100)
+            current = np.where(np.isnan(current), list_cents, current).astype(np.int64)
+        else:
+            current = list_cents
+        current = np.where(matched, current, 0)
+        generic = np.where(is_brand, np.minimum(current, self.generic_cents[code] * quantity), current)
+        alternative = np.minimum(current, self.best_cents[code] * quantity)
+
+        slot = np.where(matched, code + 1, 0)
+        size = len(self.drug_names) + 1
+        values = [np.ones(len(claims), dtype=np.int64), is_brand.astype(np.int64), current,
+                  np.where(matched, generic, 0), np.where(matched, alternative, 0)]
+        return np.stack([np.bincount(slot, weights=value, minlength=size) for value in values]).astype(np.int64)
+
+    def summary(self, totals):
+        # Per-drug savings frame from reprice() sums
+        frame = pd.DataFrame({"Drug": [UNMATCHED] + self.drug_names})
+        frame["Claims"] = totals[0]
+        frame["Brand Claims"] = totals[1]
+        frame["Current Cost ($)"] = totals[2] / 100
+        frame["Generic Switch Savings ($)"] = (totals[2] - totals[3]) / 100
+        frame["Alternative Switch Savings ($)"] = (totals[2] - totals[4]) / 100
+        return frame[frame["Claims"] > 0].reset_index(drop=True)
+
+
+def byte_ranges(path, block_size):
+    # Header bytes plus (start, end) ranges of whole lines, each roughly block_size long
+    with open(path, "rb") as handle:
+        header = handle.readline()
+        size = os.fstat(handle.fileno()).st_size
+        ranges, start = [], len(header)
+        while start < size:
+            handle.seek(min(start + block_size, size))
+            if handle.tell() < size:
+                handle.readline()
+            end = handle.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+_pricer = None
+
+
+def _init_worker(pricer):
+    global _pricer
+    _pricer = pricer
+
+
+def _reprice_range(task):
+    path, header, start, end = task
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        block = handle.read(end - start)
+    claims = pd.read_csv(io.BytesIO(header + block), dtype={"drug": str, "fill_type": str})
+    return _pricer.reprice(claims)
+
+
+def run_whatif(claims_path, pricer, processes=None, block_size=64 * 2**20):
+    # Per-drug claims, cost and scenario savings for the whole claims file
+    with open(claims_path, newline="") as handle:
+        header_columns = pd.read_csv(handle, nrows=0).columns
+    missing = [column for column in REQUIRED_COLUMNS if column not in header_columns]
+    if missing:
+        raise ClaimsFormatError(f"Claims file {claims_path} is missing columns: {', '.join(missing)}")
+
+    header, ranges = byte_ranges(claims_path, block_size)
+    tasks = [(claims_path, header, start, end) for start, end in ranges]
+    totals = np.zeros((len(MEASURES), len(pricer.drug_names) + 1), dtype=np.int64)
+    if processes == 1 or len(tasks) <= 1:
+        _init_worker(pricer)
+        for task in tasks:
+            totals += _reprice_range(task)
+    else:
+        with Pool(processes, initializer=_init_worker, initargs=(pricer,)) as pool:
+            for part in pool.imap_unordered(_reprice_range, tasks):
+                totals += part
+    return pricer.summary(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprice a claims CSV under generic and alternative switching")
+    parser.add_argument("claims_path")
+    parser.add_argument("pricing_path", help="JSON with drug_data and therapeutic_alternatives")
+    parser.add_argument("--output", help="write the per-drug summary CSV here")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--block-mb", type=int, default=64)
+    args = parser.parse_args()
+    with open(args.pricing_path) as handle:
+        pricing = json.load(handle)
+    pricer = ClaimsPricer(pricing["drug_data"], pricing.get("therapeutic_alternatives"))
+    summary = run_whatif(args.claims_path, pricer, processes=args.processes, block_size=args.block_mb * 2**20)
+    if args.output:
+        summary.to_csv(args.output, index=False)
+    totals = summary.sum(numeric_only=True)
+    print(f"{int(totals['Claims'])} claims ({int(totals['Brand Claims'])} brand), "
+          f"current cost ${totals['Current Cost ($)']:,.2f}")
+    print(f"Generic switch saves ${totals['Generic Switch Savings ($)']:,.2f}; "
+          f"alternative switch saves ${totals['Alternative Switch Savings ($)']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
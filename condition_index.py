@@ -0,0 +1,80 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Inverted index condition -> drugs -> dosages -> price summary over a DrugCatalog.
+# For each condition the catalog rows of its drugs are gathered once and grouped
+# by (drug, dosage), so the unfiltered summary is precomputed and a "near me"
+# summary is one masked minimum.reduceat over that condition's rows.
+
+_CONDITION_IN_NAME = re.compile(r"^(?P<drug>.+?)\s*\((?P<condition>[^()]+)\)\s*$")
+
+
+def conditions_from_names(names):
+    # {"Atorvastatin (Cholesterol)": "Cholesterol", ...} for names that carry the condition in parentheses
+    conditions = {}
+    for name in names:
+        match = _CONDITION_IN_NAME.match(name)
+        if match:
+            conditions[name] = match.group("condition")
+    return conditions
+
+
+class ConditionIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._groups = {}
+        self._summaries = {}
+        for condition_code in range(len(catalog.conditions)):
+            drug_codes = np.flatnonzero(catalog.drug_condition == condition_code)
+            rows = np.concatenate([
+                np.arange(catalog.drug_offsets[d], catalog.drug_offsets[d + 1]) for d in drug_codes
+            ]) if len(drug_codes) else np.empty(0, dtype=np.int64)
+            if len(rows):
+                boundary = np.r_[True, (catalog.drug[rows][1:] != catalog.drug[rows][:-1])
+                                 | (catalog.dosage[rows][1:] != catalog.dosage[rows][:-1])]
+            else:
+                boundary = np.zeros(0, dtype=bool)
+            starts = np.flatnonzero(boundary)
+            self._groups[condition_code] = (rows, starts)
+            self._summaries[condition_code] = self._summarize(rows, starts, None)
+
+    def conditions(self):
+        return list(self.catalog.conditions.labels)
+
+    def _summarize(self, rows, starts, pharmacy_mask):
+        catalog = self.catalog
+        generic = catalog.generic_price[rows].astype(np.float64)
+        brand = catalog.brand_price[rows].astype(np.float64)
+        available = np.ones(len(rows), dtype=bool)
+        if pharmacy_mask is not None:
+            available = pharmacy_mask[catalog.pharmacy[rows]]
+            generic = np.where(available, generic, np.nan)
+            brand = np.where(available, brand, np.nan)
+        if not len(starts):
+            lowest_generic = lowest_brand = pharmacies = np.empty(0)
+        else:
+            lowest_generic = np.fmin.reduceat(generic, starts)
+            lowest_brand = np.fmin.reduceat(brand, starts)
+            pharmacies = np.add.reduceat(available & ~np.isnan(generic), starts)
+        summary = pd.DataFrame({
+            "Drug": catalog.drugs.decode(catalog.drug[rows][starts]),
+            "Dosage": catalog.dosages.decode(catalog.dosage[rows][starts]),
+            "Lowest Generic Price ($)": lowest_generic,
+            "Lowest Brand Price ($)": lowest_brand,
+            "Pharmacies": pharmacies,
+        })
+        summary = summary[summary["Pharmacies"] > 0]
+        return summary.sort_values("Lowest Generic Price ($)", kind="stable").reset_index(drop=True)
+
+    def drugs_for(self, condition, pharmacy_mask=None):
+        # Price summary per drug/dosage for a condition, cheapest generic first.
+        # pharmacy_mask: optional boolean array over pharmacy codes (e.g. pharmacies near the user).
+        code = self.catalog.conditions.index.get(condition)
+        if code is None:
+            return self._summarize(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), None)
+        if pharmacy_mask is None:
+            return self._summaries[code].copy()
+        rows, starts = self._groups[code]
+        return self._summarize(rows, starts, np.asarray(pharmacy_mask, dtype=bool))
@@ -0,0 +1,51 @@
+import numpy as np
+
+from drug_catalog import Codebook
+
+# Broadcasted copay engine. Prices are converted to integer cents once and plan
+# coverage to basis points, so the copay for every plan x quote combination is
+# a single integer multiply-add with half-up rounding to the cent:
+#     copay = (price_cents * (10000 - coverage_bp) + 5000) // 10000
+# Missing prices (NaN) map to MISSING in the output. Callers that do arithmetic
+# on cents (variation, discounts) should pass the quote mask explicitly rather
+# than rely on the sentinel, which arithmetic could turn into a real price.
+
+MISSING = -1
+
+
+def to_cents(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    cents = np.full(prices.shape, MISSING, dtype=np.int64)
+    quoted = ~np.isnan(prices)
+    cents[quoted] = np.rint(prices[quoted] * 100)
+    return cents
+
+
+def to_dollars(cents):
+    dollars = np.asarray(cents, dtype=np.float64) / 100
+    return np.where(np.asarray(cents) == MISSING, np.nan, dollars)
+
+
+class CopayEngine:
+    def __init__(self, insurance_plans):
+        # insurance_plans: {plan name: coverage fraction}, e.g. {"Plan A": 0.8}
+        self.plans = Codebook(insurance_plans)
+        self.coverage_bp = np.rint(np.fromiter(insurance_plans.values(), dtype=np.float64,
+                                               count=len(insurance_plans)) * 10000).astype(np.int64)
+
+    def plan_names(self):
+        return list(self.plans.labels)
+
+    def copay_cents(self, price_cents, plans=None, quoted=None):
+        # Returns an array of shape (n_plans,) + price_cents.shape.
+        # quoted: boolean mask of real quotes; defaults to price_cents != MISSING
+        price_cents = np.asarray(price_cents, dtype=np.int64)
+        quoted = price_cents != MISSING if quoted is None else np.asarray(quoted, dtype=bool)
+        bp = self.coverage_bp if plans is None else self.coverage_bp[self.plans.codes(plans)]
+        member_share = (10000 - bp).reshape((-1,) + (1,) * price_cents.ndim)
+        copay = (np.where(quoted, price_cents, 0) * member_share + 5000) // 10000
+        return np.where(quoted, copay, MISSING)
+
+    def copays(self, prices, plans=None):
+        # Dollar-in, dollar-out convenience wrapper around copay_cents
+        return to_dollars(self.copay_cents(to_cents(prices), plans))
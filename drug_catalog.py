@@ -0,0 +1,282 @@
+import numpy as np
+import pandas as pd
+
+# Columnar price catalog shared by the dashboards.
+# Drugs, dosages, pharmacies and conditions are stored as integer codes; every
+# quote is one row of parallel NumPy columns sorted by (drug, dosage, pharmacy)
+# so a drug or drug/dosage lookup is a dict hit plus a contiguous slice.
+
+
+class Codebook:
+    def __init__(self, labels=()):
+        self.labels = []
+        self.index = {}
+        self._array = None
+        for label in labels:
+            self.add(label)
+
+    def add(self, label):
+        code = self.index.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.index[label] = code
+            self.labels.append(label)
+            self._array = None
+        return code
+
+    def code(self, label):
+        return self.index[label]
+
+    def codes(self, labels):
+        return np.fromiter((self.index[label] for label in labels), dtype=np.int32, count=len(labels))
+
+    def decode(self, codes):
+        if self._array is None:
+            self._array = np.asarray(self.labels, dtype=object)
+        return self._array[codes]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.index
+
+    def __iter__(self):
+        return iter(self.labels)
+
+
+class DrugCatalog:
+    def __init__(self, drugs, dosages, pharmacies, drug, dosage, pharmacy, generic_price, brand_price,
+                 pharmacy_types=None, pharmacy_type=None, pharmacy_distance=None, pharmacy_location=None,
+                 conditions=None, drug_condition=None):
+        self.drugs = drugs
+        self.dosages = dosages
+        self.pharmacies = pharmacies
+
+        # Dosages keep their first-appearance order within each drug
+        pair_rank = pd.factorize(drug.astype(np.int64) * max(len(dosages), 1) + dosage)[0]
+        order = np.lexsort((pharmacy, pair_rank, drug))
+        self.drug = np.ascontiguousarray(drug[order], dtype=np.int32)
+        self.dosage = np.ascontiguousarray(dosage[order], dtype=np.int32)
+        self.pharmacy = np.ascontiguousarray(pharmacy[order], dtype=np.int32)
+        self.generic_price = np.ascontiguousarray(generic_price[order], dtype=np.float32)
+        self.brand_price = np.ascontiguousarray(brand_price[order], dtype=np.float32)
+
+        # Per-pharmacy attributes, indexed by pharmacy code
+        self.pharmacy_types = pharmacy_types if pharmacy_types is not None else Codebook(["Retail"])
+        n_pharmacies = len(pharmacies)
+        if pharmacy_type is None:
+            pharmacy_type = np.zeros(n_pharmacies, dtype=np.int8)
+        if pharmacy_distance is None:
+            pharmacy_distance = np.zeros(n_pharmacies, dtype=np.float32)
+        self.pharmacy_type = np.asarray(pharmacy_type, dtype=np.int8)
+        self.pharmacy_distance = np.asarray(pharmacy_distance, dtype=np.float32)
+        # (latitude, longitude) per pharmacy; NaN for pharmacies without a storefront (mail order)
+        if pharmacy_location is None:
+            pharmacy_location = np.full((n_pharmacies, 2), np.nan)
+        self.pharmacy_location = np.asarray(pharmacy_location, dtype=np.float64)
+
+        # Per-drug attributes, indexed by drug code
+        self.conditions = conditions if conditions is not None else Codebook()
+        if drug_condition is None:
+            drug_condition = np.full(len(drugs), -1, dtype=np.int32)
+        self.drug_condition = np.asarray(drug_condition, dtype=np.int32)
+
+        self._index_slices()
+
+    def _index_slices(self):
+        n = len(self.drug)
+        self.drug_offsets = np.searchsorted(self.drug, np.arange(len(self.drugs) + 1)).astype(np.int64)
+
+        boundary = np.ones(n, dtype=bool)
+        if n:
+            boundary[1:] = (self.drug[1:] != self.drug[:-1]) | (self.dosage[1:] != self.dosage[:-1])
+        starts = np.flatnonzero(boundary)
+        stops = np.append(starts[1:], n)
+        self._slices = {
+            (int(d), int(s)): slice(int(a), int(b))
+            for d, s, a, b in zip(self.drug[starts], self.dosage[starts], starts, stops)
+        }
+        self._drug_dosages = {}
+        for d, s in self._slices:
+            self._drug_dosages.setdefault(d, []).append(s)
+
+    # -- construction -------------------------------------------------------
+
+    @classmethod
+    def from_frame(cls, quotes, pharmacies=None, conditions=None):
+        # quotes: DataFrame with drug, dosage, pharmacy, generic_price and optional brand_price.
+        # pharmacies: optional DataFrame with name, type, distance and optional lat/lon.
+        # conditions: optional mapping drug -> condition.
+        drug_codes, drug_labels = pd.factorize(quotes["drug"], sort=False)
+        dosage_codes, dosage_labels = pd.factorize(quotes["dosage"], sort=False)
+
+        pharmacy_book = Codebook()
+        pharmacy_types = Codebook()
+        pharmacy_type = []
+        pharmacy_distance = []
+        pharmacy_location = []
+        if pharmacies is not None:
+            lat = pharmacies["lat"] if "lat" in pharmacies else [np.nan] * len(pharmacies)
+            lon = pharmacies["lon"] if "lon" in pharmacies else [np.nan] * len(pharmacies)
+            for name, kind, distance, *location in zip(pharmacies["name"], pharmacies["type"],
+                                                       pharmacies["distance"], lat, lon):
+                pharmacy_book.add(name)
+                pharmacy_type.append(pharmacy_types.add(kind))
+                pharmacy_distance.append(distance)
+                pharmacy_location.append(location)
+        pharmacy_codes, pharmacy_labels = pd.factorize(quotes["pharmacy"], sort=False)
+        remap = np.fromiter((pharmacy_book.add(label) for label in pharmacy_labels), dtype=np.int32,
+                            count=len(pharmacy_labels))
+        if len(pharmacy_book) > len(pharmacy_type):
+            default_type = pharmacy_types.add("Retail")
+            missing = len(pharmacy_book) - len(pharmacy_type)
+            pharmacy_type.extend([default_type] * missing)
+            pharmacy_distance.extend([0.0] * missing)
+            pharmacy_location.extend([(np.nan, np.nan)] * missing)
+
+        drugs = Codebook(drug_labels)
+        condition_book = Codebook()
+        drug_condition = np.full(len(drugs), -1, dtype=np.int32)
+        if conditions:
+            for name, code in drugs.index.items():
+                condition = conditions.get(name)
+                if condition is not None:
+                    drug_condition[code] = condition_book.add(condition)
+
+        if "brand_price" in quotes:
+            brand_price = quotes["brand_price"].to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            brand_price = np.full(len(quotes), np.nan, dtype=np.float32)
+
+        return cls(
+            drugs, Codebook(dosage_labels), pharmacy_book,
+            drug_codes.astype(np.int32), dosage_codes.astype(np.int32), remap[pharmacy_codes],
+            quotes["generic_price"].to_numpy(dtype=np.float32), brand_price,
+            pharmacy_types=pharmacy_types,
+            pharmacy_type=np.asarray(pharmacy_type, dtype=np.int8),
+            pharmacy_distance=np.asarray(pharmacy_distance, dtype=np.float32),
+            pharmacy_location=np.asarray(pharmacy_location, dtype=np.float64).reshape(-1, 2),
+            conditions=condition_book, drug_condition=drug_condition,
+        )
+
+    @classmethod
+    def from_dosage_prices(cls, drug_data, pharmacies):
+        # drug_data[drug][dosage] -> base price, quoted at every pharmacy dict in `pharmacies`
+        prices = pd.DataFrame(
+            [(drug, dosage, price) for drug, dosages in drug_data.items() for dosage, price in dosages.items()],
+            columns=["drug", "dosage", "generic_price"],
+        )
+        return cls.from_dosage_frame(prices, pharmacies)
+
+    @classmethod
+    def from_dosage_frame(cls, prices, pharmacies):
+        # prices: DataFrame with drug, dosage, generic_price; every row is quoted at every pharmacy
+        pharmacies = pd.DataFrame(pharmacies)
+        n_prices, n_pharmacies = len(prices), len(pharmacies)
+        quotes = pd.DataFrame({
+            "drug": np.repeat(prices["drug"].to_numpy(), n_pharmacies),
+            "dosage": np.repeat(prices["dosage"].to_numpy(), n_pharmacies),
+            "pharmacy": np.tile(pharmacies["name"].to_numpy(), n_prices),
+            "generic_price": np.repeat(prices["generic_price"].to_numpy(), n_pharmacies),
+        })
+        return cls.from_frame(quotes, pharmacies=pharmacies)
+
+    @classmethod
+    def from_pharmacy_prices(cls, drug_data):
+        # drug_data[drug][dosage][pharmacy] -> price
+        rows = [
+            (drug, dosage, pharmacy, price)
+            for drug, dosages in drug_data.items()
+            for dosage, prices in dosages.items()
+            for pharmacy, price in prices.items()
+        ]
+        quotes = pd.DataFrame(rows, columns=["drug", "dosage", "pharmacy", "generic_price"])
+        return cls.from_frame(quotes)
+
+    @classmethod
+    def from_generic_brand(cls, drug_data, pharmacies, conditions=None):
+        # drug_data[drug] -> {"dosages": [...], "generic_price": x, "brand_price": y, "condition": optional}
+        # conditions: optional {drug: condition} for data that does not carry a "condition" field
+        rows = [
+            (drug, dosage, pharmacy, info["generic_price"], info["brand_price"])
+            for drug, info in drug_data.items()
+            for dosage in info["dosages"]
+            for pharmacy in pharmacies
+        ]
+        quotes = pd.DataFrame(rows, columns=["drug", "dosage", "pharmacy", "generic_price", "brand_price"])
+        conditions = dict(conditions or {})
+        conditions.update({drug: info["condition"] for drug, info in drug_data.items() if "condition" in info})
+        return cls.from_frame(quotes, conditions=conditions)
+
+    # -- lookups ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.drug)
+
+    def drug_names(self):
+        return list(self.drugs.labels)
+
+    def dosages_for(self, drug):
+        return [self.dosages.labels[code] for code in self._drug_dosages.get(self.drugs.code(drug), [])]
+
+    def quotes(self, drug, dosage=None):
+        # Row slice for a drug, or for one drug/dosage pair
+        drug_code = self.drugs.code(drug)
+        if dosage is None:
+            return slice(int(self.drug_offsets[drug_code]), int(self.drug_offsets[drug_code + 1]))
+        return self._slices.get((drug_code, self.dosages.code(dosage)), slice(0, 0))
+
+    def rows(self, drug, dosage=None):
+        span = self.quotes(drug, dosage)
+        return np.arange(span.start, span.stop)
+
+    def selection(self, drug_selections):
+        # Row indices for a {drug: dosage} mapping, in selection order
+        parts = [self.rows(drug, dosage) for drug, dosage in drug_selections.items()]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def pharmacy_mask(self, rows, max_distance=None, types=None, distances=None):
+        # distances: optional per-pharmacy distance array overriding the static pharmacy_distance
+        pharmacy = self.pharmacy[rows]
+        mask = np.ones(len(pharmacy), dtype=bool)
+        if max_distance is not None:
+            distance = self.pharmacy_distance if distances is None else distances
+            mask &= distance[pharmacy] <= max_distance
+        if types is not None:
+            type_codes = [self.pharmacy_types.index[t] for t in types if t in self.pharmacy_types]
+            mask &= np.isin(self.pharmacy_type[pharmacy], type_codes)
+        return mask
+
+    def cheapest(self, rows, k, prices=None):
+        # Positions (into rows) of the k cheapest quoted rows, ascending, and how many rows were quoted.
+        # prices overrides the catalog generic price for these rows, e.g. after adding variation.
+        prices = self.generic_price[rows] if prices is None else np.asarray(prices)
+        quoted = np.flatnonzero(~np.isnan(prices))
+        count = len(quoted)
+        if k < count:
+            quoted = quoted[np.argpartition(prices[quoted], k - 1)[:k]]
+        return quoted[np.argsort(prices[quoted], kind="stable")], count
+
+    def drug_price_summary(self):
+        # Lowest generic and brand price per drug code across all dosages and pharmacies
+        n = len(self.drugs)
+        generic = np.full(n, np.nan, dtype=np.float32)
+        brand = np.full(n, np.nan, dtype=np.float32)
+        present = self.drug_offsets[1:] > self.drug_offsets[:-1]
+        if present.any():
+            starts = self.drug_offsets[:-1][present]
+            generic[present] = np.minimum.reduceat(self.generic_price, starts)
+            brand[present] = np.fmin.reduceat(self.brand_price, starts)
+        return generic, brand
+
+    def frame(self, rows):
+        pharmacy = self.pharmacy[rows]
+        return pd.DataFrame({
+            "Drug": self.drugs.decode(self.drug[rows]),
+            "Dosage": self.dosages.decode(self.dosage[rows]),
+            "Pharmacy": self.pharmacies.decode(pharmacy),
+            "Type": self.pharmacy_types.decode(self.pharmacy_type[pharmacy]),
+            "Generic Price ($)": self.generic_price[rows],
+            "Brand Price ($)": self.brand_price[rows],
+        })
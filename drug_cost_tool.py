@@ -1,7 +1,16 @@
 
 import streamlit as st
-import pandas as pd
-import random
+import numpy as np
+import os
+from catalog_provider import cached_catalog, data_version, path_version, shared_resource
+from copay_engine import CopayEngine, to_cents
+from drug_catalog import DrugCatalog
+from drug_search import DrugSearch
+from formulary_rules import FormularyEngine, catalog_columns, status_labels
+from nadac_ingest import latest_nadac_prices
+from pharmacy_locator import PharmacyLocator, load_zip_centroids
+from result_frames import compact_frame, show_frame
+from synthetic_prices import SyntheticPriceModel
 
 # Synthetic data for demonstration
 drug_data = {
@@ -11,66 +20,172 @@ drug_data = {
 }
 
 pharmacies = [
-    {"name": "HealthPlus Pharmacy", "type": "Retail", "distance": 2},
+    {"name": "HealthPlus Pharmacy", "type": "Retail", "distance": 2, "lat": 42.8432, "lon": -73.9396},
     {"name": "WellCare Pharmacy", "type": "Mail Order", "distance": 0},
-    {"name": "CityMeds", "type": "Retail", "distance": 5},
+    {"name": "CityMeds", "type": "Retail", "distance": 5, "lat": 42.7530, "lon": -73.8990},
     {"name": "PharmaDirect", "type": "Mail Order", "distance": 0}
 ]
 
+brand_names = {
+    "Atorvastatin": ["Lipitor"],
+    "Lisinopril": ["Prinivil", "Zestril"],
+    "Metformin": ["Glucophage"]
+}
+
 insurance_plans = {
     "Plan A": 0.8,
     "Plan B": 0.7,
     "Plan C": 0.6
 }
 
+# Synthetic formulary rules per plan; the first matching rule sets each outcome (tier 0 = not covered)
+formulary_rules = {
+    "Plan A": [
+        {"when": {"drug": ("in", ["Atorvastatin", "Lisinopril", "Metformin"]), "price": ("<", 20)},
+         "then": {"tier": 1}},
+        {"when": {"price": ("<", 20)}, "then": {"tier": 2}}
+    ],
+    "Plan B": [
+        {"when": {"price": ("<", 20)}, "then": {"tier": 1}},
+        {"when": {"drug": ("==", "Atorvastatin")}, "then": {"step_therapy": True}}
+    ],
+    "Plan C": [
+        {"when": {"price": ("<", 15)}, "then": {"tier": 1}},
+        {"when": {"price": ("<", 20)}, "then": {"tier": 2, "prior_auth": True}},
+        {"when": {"dosage": ("in", ["1000mg"])}, "then": {"quantity_limit": 60}}
+    ]
+}
+
+# Use the ingested NADAC store when one is available (see nadac_ingest.py)
+NADAC_STORE = os.environ.get("NADAC_STORE", "data/nadac")
+
+
+def build_catalog(nadac_store):
+    if os.path.isdir(nadac_store):
+        nadac_prices = latest_nadac_prices(nadac_store)
+        nadac_prices = nadac_prices.groupby(["drug", "dosage"], observed=True, as_index=False)["generic_price"].min()
+        return DrugCatalog.from_dosage_frame(nadac_prices, pharmacies)
+    return DrugCatalog.from_dosage_prices(drug_data, pharmacies)
+
+
+# Shared by all sessions; rebuilt when the NADAC store or the synthetic data changes
+catalog = cached_catalog(build_catalog, NADAC_STORE,
+                         version=path_version(NADAC_STORE) + data_version(drug_data, pharmacies))
+copay_engine = CopayEngine(insurance_plans)
+drug_search = shared_resource(DrugSearch.from_catalog, catalog, brand_names)
+price_model = SyntheticPriceModel(seed=2024)
+formulary = shared_resource(FormularyEngine.for_catalog, formulary_rules, catalog)
+ZIP_CENTROIDS = os.environ.get("ZIP_CENTROIDS", "zip_centroids.csv")
+zip_centroids = shared_resource(load_zip_centroids, ZIP_CENTROIDS, version=path_version(ZIP_CENTROIDS))
+locator = shared_resource(PharmacyLocator.from_catalog, catalog)
+
 # Streamlit UI
 st.title("💊 Real-Time Drug Cost Comparison Tool")
 st.markdown("**Powered by synthetic NADAC & FDB datasets**")
 
 # User Inputs
-drug_name = st.selectbox("Select Drug Name", list(drug_data.keys()))
-dosage = st.selectbox("Select Dosage", list(drug_data[drug_name].keys()))
-zip_code = st.text_input("Enter ZIP Code", "12345")
-insurance_plan = st.selectbox("Select Insurance Plan", list(insurance_plans.keys()))
+drug_query = st.text_input("Search Drug Name (generic or brand)", "")
+drug_matches = drug_search.search(drug_query, limit=20) if drug_query else catalog.drug_names()[:20]
+if not drug_matches:
+    st.warning(f"No drugs match '{drug_query}'.")
+    drug_matches = catalog.drug_names()[:20]
+drug_name = st.selectbox("Select Drug Name", drug_matches)
+dosage = st.selectbox("Select Dosage", catalog.dosages_for(drug_name))
 
 # Sidebar Filters
+# Edits inside the form are batched: nothing reruns until "Apply Filters", which
+# issues one query with every change (ZIP entry included). Each changed filter
+# would otherwise have cost at least one rerun of its own.
+DEFAULT_FILTERS = {"max_distance": 5, "pharmacy_type": ["Retail", "Mail Order"], "top_k": 10,
+                   "zip_code": "12345", "insurance_plan": copay_engine.plan_names()[0]}
+st.session_state.setdefault("applied_filters", dict(DEFAULT_FILTERS))
+st.session_state.setdefault("reruns_avoided", 0)
+
+
+def apply_filters():
+    pending = {name: st.session_state[f"filter_{name}"] for name in DEFAULT_FILTERS}
+    zip_entry = pending["zip_code"].strip()
+    if not (len(zip_entry) == 5 and zip_entry.isdigit()):
+        zip_entry = st.session_state.applied_filters["zip_code"]
+        st.session_state.zip_error = f"'{pending['zip_code']}' is not a 5-digit ZIP code; keeping {zip_entry}."
+    else:
+        st.session_state.zip_error = None
+    pending["zip_code"] = zip_entry
+    changed = sum(pending[name] != st.session_state.applied_filters[name] for name in DEFAULT_FILTERS)
+    st.session_state.reruns_avoided += max(changed - 1, 0)
+    st.session_state.applied_filters = pending
+
+
 st.sidebar.header("🔍 Filters")
-max_distance = st.sidebar.slider("Maximum Distance (miles)", 0, 10, 5)
-pharmacy_type = st.sidebar.multiselect("Pharmacy Type", ["Retail", "Mail Order"], default=["Retail", "Mail Order"])
+applied = st.session_state.applied_filters
+with st.sidebar.form("filters"):
+    st.slider("Maximum Distance (miles)", 0, 10, applied["max_distance"], key="filter_max_distance")
+    st.multiselect("Pharmacy Type", ["Retail", "Mail Order"], default=applied["pharmacy_type"],
+                   key="filter_pharmacy_type")
+    st.number_input("Show Cheapest Pharmacies", min_value=1, max_value=100, value=applied["top_k"],
+                    key="filter_top_k")
+    st.text_input("Enter ZIP Code", applied["zip_code"], key="filter_zip_code")
+    st.selectbox("Select Insurance Plan", copay_engine.plan_names(),
+                 index=copay_engine.plan_names().index(applied["insurance_plan"]), key="filter_insurance_plan")
+    st.form_submit_button("Apply Filters", on_click=apply_filters)
+if st.session_state.get("zip_error"):
+    st.sidebar.error(st.session_state.zip_error)
+st.sidebar.metric("Reruns Avoided", st.session_state.reruns_avoided,
+                  help="Filter changes applied together instead of one rerun each")
+
+applied = st.session_state.applied_filters
+max_distance, pharmacy_type, top_k = applied["max_distance"], applied["pharmacy_type"], applied["top_k"]
+zip_code, insurance_plan = applied["zip_code"], applied["insurance_plan"]
 
-# Calculate base price and copay
-base_price = drug_data[drug_name][dosage]
-coverage = insurance_plans[insurance_plan]
-copay = round(base_price * (1 - coverage), 2)
+rows = catalog.rows(drug_name, dosage)
 
 # Generate results
-results = []
-for pharmacy in pharmacies:
-    if pharmacy["distance"] <= max_distance and pharmacy["type"] in pharmacy_type:
-        price_variation = round(random.uniform(-1.0, 1.0), 2)
-        final_price = round(base_price + price_variation, 2)
-        final_copay = round(final_price * (1 - coverage), 2)
-        results.append({
-            "Pharmacy": pharmacy["name"],
-            "Type": pharmacy["type"],
-            "Distance (mi)": pharmacy["distance"],
-            "Price ($)": final_price,
-            "Copay Estimate ($)": final_copay,
-            "Formulary Status": "Covered" if final_price < 20 else "Not Covered"
-        })
+origin = zip_centroids.lookup(zip_code)
+if origin is None:
+    st.sidebar.warning(f"ZIP code {zip_code} not found; using each pharmacy's listed distance.")
+    distances = catalog.pharmacy_distance
+else:
+    distances = locator.distance_vector(*origin, max_distance)
+rows = rows[catalog.pharmacy_mask(rows, max_distance=max_distance, types=pharmacy_type, distances=distances)]
+# Per-pharmacy variation of +/-5% of the fill price, so quotes never go negative
+price_variation = price_model.uniform(catalog.drug[rows], catalog.pharmacy[rows], -0.05, 0.05)
+quoted_prices = catalog.generic_price[rows] * (1 + price_variation)
+quoted = ~np.isnan(quoted_prices)
+price_cents = to_cents(np.maximum(quoted_prices, 0))
+best, matched = catalog.cheapest(rows, int(top_k), prices=np.where(quoted, price_cents, np.nan))
+rows, price_cents, quoted = rows[best], price_cents[best], quoted[best]
+copay_cents = copay_engine.copay_cents(price_cents, quoted=quoted)
+final_price = price_cents / 100
+final_copay = copay_cents[copay_engine.plans.code(insurance_plan)] / 100
+formulary_status = formulary.evaluate(catalog_columns(catalog, rows, price=final_price))
+pharmacy_codes = catalog.pharmacy[rows]
+results = compact_frame({
+    "Pharmacy": (pharmacy_codes, catalog.pharmacies),
+    "Type": (catalog.pharmacy_type[pharmacy_codes], catalog.pharmacy_types),
+    "Distance (mi)": np.round(distances[pharmacy_codes], 1),
+    "Price ($)": final_price,
+    "Copay Estimate ($)": final_copay,
+    "Formulary Status": status_labels(formulary_status, formulary.plans.code(insurance_plan))
+})
 
 # Display results
 st.subheader("📋 Comparison Results")
-if results:
-    df = pd.DataFrame(results)
-    st.dataframe(df)
+if len(results):
+    st.caption(f"Showing the {len(results)} cheapest of {matched} matching pharmacies")
+    show_frame(results, formats={"Distance (mi)": "%.1f"})
 
     # Alert for cheaper alternatives
-    cheapest = min(results, key=lambda x: x["Price ($)"])
+    cheapest = results.iloc[0]
     if cheapest["Price ($)"] > 15:
         st.warning("💡 Consider asking your provider about generic alternatives to reduce cost.")
     else:
-        st.success(f"✅ Best price found at {cheapest['Pharmacy']} for ${cheapest['Price ($)']}")
+        st.success(f"✅ Best price found at {cheapest['Pharmacy']} for ${cheapest['Price ($)']:.2f}")
+
+    # Copay under every plan, side by side
+    st.subheader("🛡️ Copay by Insurance Plan")
+    df_plans = compact_frame({"Pharmacy": (pharmacy_codes, catalog.pharmacies),
+                              **dict(zip(copay_engine.plan_names(), copay_cents / 100))})
+    show_frame(df_plans)
 else:
     st.info("No pharmacies found matching your filters.")
 
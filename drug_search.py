@@ -0,0 +1,87 @@
+import bisect
+import re
+
+import numpy as np
+
+# Server-side typeahead over drug names.
+# Every name and synonym (brand/generic) is normalized and split into padded
+# character trigrams; each trigram has a posting list of entry ids. A query
+# scores entries by Dice similarity of shared trigrams (one bincount over the
+# query's posting lists), boosts prefix matches found by bisect over the sorted
+# entries, and keeps the best score per drug. Misspellings still share most
+# trigrams, which gives typo tolerance without an edit-distance scan.
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+PREFIX_BOOST = 1.0
+
+
+def normalize(text):
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(text):
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DrugSearch:
+    def __init__(self, names, synonyms=None):
+        # names: drug labels to return; synonyms: optional {name: [brand or generic names]}
+        self.names = list(names)
+        entries = []
+        for code, name in enumerate(self.names):
+            entries.append((normalize(name), code))
+            for synonym in (synonyms or {}).get(name, []):
+                entries.append((normalize(synonym), code))
+        entries = list(dict.fromkeys(entries))
+        self._entry_target = np.fromiter((code for _, code in entries), dtype=np.int32, count=len(entries))
+
+        postings = {}
+        gram_counts = np.empty(len(entries), dtype=np.float32)
+        for entry, (text, _) in enumerate(entries):
+            grams = trigrams(text)
+            gram_counts[entry] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = gram_counts
+
+        # Every word start is a prefix key, so "lipi" finds "Lipitor" and "atorvastatin calcium" finds by "calc"
+        prefix_keys = sorted(
+            (text[start:], entry)
+            for entry, (text, _) in enumerate(entries)
+            for start in [0] + [m.end() for m in re.finditer(" ", text)]
+        )
+        self._prefix_text = [text for text, _ in prefix_keys]
+        self._prefix_entry = np.fromiter((entry for _, entry in prefix_keys), dtype=np.int32,
+                                         count=len(prefix_keys))
+
+    @classmethod
+    def from_catalog(cls, catalog, synonyms=None):
+        return cls(catalog.drug_names(), synonyms)
+
+    def search(self, query, limit=10):
+        # Up to `limit` drug names, best match first
+        query = normalize(query)
+        if not query:
+            return []
+        grams = trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        n_entries = len(self._entry_target)
+        if lists:
+            shared = np.bincount(np.concatenate(lists), minlength=n_entries).astype(np.float32)
+            scores = 2 * shared / (len(grams) + self._gram_counts)
+        else:
+            scores = np.zeros(n_entries, dtype=np.float32)
+
+        start = bisect.bisect_left(self._prefix_text, query)
+        stop = bisect.bisect_left(self._prefix_text, query + "￿")
+        scores[self._prefix_entry[start:stop]] += PREFIX_BOOST
+
+        best = np.zeros(len(self.names), dtype=np.float32)
+        np.maximum.at(best, self._entry_target, scores)
+        candidates = np.flatnonzero(best > 0.3)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-best[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-best[candidates], kind="stable")]
+        return [self.names[code] for code in candidates]
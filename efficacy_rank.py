@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Per-condition value ranking of treatment options.
+# Every drug and its therapeutic alternatives are grouped under the drug's
+# condition. For each condition the options are ranked once by efficacy per
+# dollar, and the efficacy-vs-cost Pareto frontier (no other option is both
+# cheaper and at least as effective) is marked with a running maximum over the
+# options sorted by price. The ranked frames are kept ready to serve; a price
+# change re-ranks only the conditions that list that option.
+
+
+class EfficacyRanking:
+    def __init__(self, options, efficacy):
+        # options: {condition: {name: price}}; efficacy: {name: score}. Unscored options are left out.
+        self.options = {condition: {name: price for name, price in names.items() if name in efficacy}
+                        for condition, names in options.items()}
+        self.efficacy = dict(efficacy)
+        self._conditions_of = {}
+        for condition, names in self.options.items():
+            for name in names:
+                self._conditions_of.setdefault(name, []).append(condition)
+        self._rankings = {condition: self._rank(condition) for condition in self.options}
+
+    @classmethod
+    def from_catalog(cls, catalog, alternative_index, efficacy, prices=None):
+        # Drug prices default to the lowest generic price; alternatives inherit their drug's condition
+        if prices is None:
+            prices = catalog.drug_price_summary()[0]
+        options = {}
+        for code, drug in enumerate(catalog.drug_names()):
+            condition = catalog.drug_condition[code]
+            if condition < 0:
+                continue
+            names = options.setdefault(catalog.conditions.labels[condition], {})
+            names[drug] = float(prices[code])
+            for alternative, price, _ in alternative_index.alternatives(drug):
+                names.setdefault(alternative, price)
+        return cls(options, efficacy)
+
+    def _rank(self, condition):
+        names = list(self.options[condition])
+        price = np.array([self.options[condition][name] for name in names], dtype=np.float64)
+        score = np.array([self.efficacy[name] for name in names], dtype=np.float64)
+        per_dollar = np.divide(score, price, out=np.full(len(names), np.inf), where=price > 0)
+
+        # Cheapest first (ties: most effective first); on the frontier iff it beats every cheaper option
+        by_price = np.lexsort((-score, price))
+        best_before = np.maximum.accumulate(np.concatenate([[-np.inf], score[by_price]]))[:-1]
+        pareto = np.zeros(len(names), dtype=bool)
+        pareto[by_price] = score[by_price] > best_before
+
+        order = np.lexsort((price, -per_dollar))
+        return pd.DataFrame({
+            "Rank": np.arange(1, len(names) + 1),
+            "Drug": np.asarray(names, dtype=object)[order],
+            "Efficacy Score (1-10)": score[order],
+            "Price ($)": price[order],
+            "Efficacy per $": np.round(per_dollar[order], 3),
+            "Pareto Optimal": pareto[order],
+        })
+
+    def conditions(self):
+        return list(self.options)
+
+    def ranking(self, condition):
+        return self._rankings[condition].copy()
+
+    def frontier(self, condition):
+        # Pareto-optimal options, cheapest first
+        ranked = self._rankings[condition]
+        return ranked[ranked["Pareto Optimal"]].sort_values("Price ($)").reset_index(drop=True)
+
+    def update_price(self, name, price):
+        for condition in self._conditions_of.get(name, []):
+            self.options[condition][name] = price
+            self._rankings[condition] = self._rank(condition)
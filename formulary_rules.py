@@ -0,0 +1,122 @@
+import operator
+
+import numpy as np
+
+from drug_catalog import Codebook
+
+# Formulary rules engine.
+# Each plan has an ordered list of rules:
+#     {"when": {"price": ("<", 20), "drug": ("in", ["Atorvastatin"])}, "then": {"tier": 1}}
+# "when" is an AND of column comparisons; "then" sets any of tier (0 = not
+# covered), prior_auth, step_therapy and quantity_limit. Rules that set a tier
+# are exclusive: the first one matching a row applies all of its outcomes.
+# Rules without a tier are overlays (e.g. a quantity limit on one dosage) and
+# apply to every row they match. Rule sets are compiled once: label
+# comparisons on categorical columns become integer-code comparisons, and
+# evaluation is one vectorized boolean mask per rule over whole catalog columns.
+
+OUTCOMES = {"tier": (np.int8, 0), "prior_auth": (bool, False), "step_therapy": (bool, False),
+            "quantity_limit": (np.int32, 0)}
+CATEGORICAL_COLUMNS = ("drug", "dosage", "pharmacy_type", "condition")
+
+_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+                "==": operator.eq, "!=": operator.ne}
+
+
+class FormularyRuleError(ValueError):
+    pass
+
+
+def _compile_condition(column, op, value, codebooks):
+    if column in CATEGORICAL_COLUMNS:
+        book = codebooks.get(column, Codebook())
+        if op in ("in", "not in"):
+            codes = np.asarray([book.index[label] for label in value if label in book], dtype=np.int64)
+            negate = op == "not in"
+            return lambda columns: np.isin(columns[column], codes, invert=negate)
+        if op in ("==", "!="):
+            code = book.index.get(value, -2)
+            compare = _COMPARISONS[op]
+            return lambda columns: compare(columns[column], code)
+        raise FormularyRuleError(f"Operator {op!r} is not supported for categorical column {column!r}")
+    if op not in _COMPARISONS:
+        raise FormularyRuleError(f"Unknown operator {op!r} for column {column!r}")
+    compare = _COMPARISONS[op]
+    return lambda columns: compare(columns[column], value)
+
+
+def _compile_rule(rule, codebooks):
+    conditions = [_compile_condition(column, op, value, codebooks)
+                  for column, (op, value) in rule.get("when", {}).items()]
+    outcome = rule.get("then", {})
+    unknown = set(outcome) - set(OUTCOMES)
+    if unknown:
+        raise FormularyRuleError(f"Unknown rule outcome(s): {', '.join(sorted(unknown))}")
+
+    def mask(columns, n_rows):
+        matched = np.ones(n_rows, dtype=bool)
+        for condition in conditions:
+            matched &= condition(columns)
+        return matched
+
+    return mask, outcome
+
+
+class FormularyEngine:
+    def __init__(self, formulary_rules, codebooks=None):
+        # formulary_rules: {plan: [rule, ...]}; codebooks: {categorical column: Codebook}
+        codebooks = codebooks or {}
+        self.plans = Codebook(formulary_rules)
+        self._compiled = [[_compile_rule(rule, codebooks) for rule in rules] for rules in formulary_rules.values()]
+
+    @classmethod
+    def for_catalog(cls, formulary_rules, catalog):
+        return cls(formulary_rules, codebooks={"drug": catalog.drugs, "dosage": catalog.dosages,
+                                               "pharmacy_type": catalog.pharmacy_types,
+                                               "condition": catalog.conditions})
+
+    def plan_names(self):
+        return list(self.plans.labels)
+
+    def evaluate(self, columns):
+        # columns: {name: array} all of one length. Returns {outcome: (n_plans, n_rows) array}.
+        n_rows = len(next(iter(columns.values())))
+        results = {name: np.full((len(self.plans), n_rows), default, dtype=dtype)
+                   for name, (dtype, default) in OUTCOMES.items()}
+        for plan, rules in enumerate(self._compiled):
+            untiered = np.ones(n_rows, dtype=bool)
+            for mask, outcome in rules:
+                hit = mask(columns, n_rows)
+                if "tier" in outcome:
+                    hit &= untiered
+                    untiered &= ~hit
+                for name, value in outcome.items():
+                    results[name][plan, hit] = value
+        return results
+
+
+def catalog_columns(catalog, rows, price=None):
+    # Rule-evaluation columns for catalog rows; `price` defaults to the generic price
+    pharmacy = catalog.pharmacy[rows]
+    drug = catalog.drug[rows]
+    return {
+        "drug": drug,
+        "dosage": catalog.dosage[rows],
+        "pharmacy_type": catalog.pharmacy_type[pharmacy],
+        "condition": catalog.drug_condition[drug],
+        "generic_price": catalog.generic_price[rows],
+        "brand_price": catalog.brand_price[rows],
+        "price": catalog.generic_price[rows] if price is None else np.asarray(price),
+    }
+
+
+def status_labels(results, plan):
+    # "Covered (Tier 2, PA, ST, QL 60)" / "Not Covered" for one plan's row of evaluate() output
+    tier = results["tier"][plan]
+    quantity_limit = results["quantity_limit"][plan]
+    notes = np.char.add("Tier ", tier.astype(str))
+    notes = np.char.add(notes, np.where(results["prior_auth"][plan], ", PA", ""))
+    notes = np.char.add(notes, np.where(results["step_therapy"][plan], ", ST", ""))
+    notes = np.char.add(notes, np.where(quantity_limit > 0, np.char.add(", QL ", quantity_limit.astype(str)), ""))
+    covered = np.char.add(np.char.add("Covered (", notes), ")")
+    return np.where(tier > 0, covered, "Not Covered").astype(object)
@@ -1,6 +1,13 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+import os
+from catalog_provider import data_version
+from basket_optimizer import cheapest_single_pharmacy, optimize_basket
+from chart_cache import shared_chart_cache, show_chart_metrics
+from drug_catalog import DrugCatalog
+from paged_table import ColumnarTable, paged_dataframe
+from price_matrix import build_price_matrix, open_price_matrix, published_version
 
 # Synthetic data for demonstration
 drug_data = {
@@ -12,37 +19,85 @@ drug_data = {
                   '1000mg': {'Pharmacy A': 6.5, 'Pharmacy B': 6.0, 'Pharmacy C': 7.0}}
 }
 
+# Shared read-only price matrix, built once and memory-mapped by every session
+PRICE_MATRIX = os.environ.get("PRICE_MATRIX", "data/price_matrix")
+# Rebuilt whenever drug_data changes; other workers pick up the new version on their next rerun
+matrix_version = data_version(drug_data)
+if published_version(PRICE_MATRIX) != matrix_version:
+    build_price_matrix(DrugCatalog.from_pharmacy_prices(drug_data), PRICE_MATRIX, version=matrix_version)
+prices = open_price_matrix(PRICE_MATRIX)
+chart_cache = shared_chart_cache()
+
 st.title("Multi-Drug Price Comparison Dashboard")
 
 # Drug selection
-selected_drugs = st.multiselect("Select Drugs", list(drug_data.keys()))
+selected_drugs = st.multiselect("Select Drugs", prices.drug_names())
 
 # Dosage selection for each selected drug
 selected_dosages = {}
 for drug in selected_drugs:
-    dosages = list(drug_data[drug].keys())
+    dosages = prices.dosages_for(drug)
     selected_dosages[drug] = st.selectbox(f"Select dosage for {drug}", dosages)
 
 # Display comparative table
 if selected_drugs:
     st.subheader("Price Comparison Table")
-    comparison_rows = []
-    for drug in selected_drugs:
-        dosage = selected_dosages[drug]
-        prices = drug_data[drug][dosage]
-        for pharmacy, price in prices.items():
-            comparison_rows.append({"Drug": drug, "Dosage": dosage, "Pharmacy": pharmacy, "Price": price})
-    df_comparison = pd.DataFrame(comparison_rows)
-    st.dataframe(df_comparison)
+    rows = prices.rows(selected_dosages)
+    table = prices.generic_price[rows]
+    quoted = ~np.isnan(table)
+    row_index, pharmacy_index = np.nonzero(quoted)
+    selected_codes = prices.drugs.codes(selected_drugs)
+    dosage_codes = prices.dosages.codes([selected_dosages[drug] for drug in selected_drugs])
+    comparison_table = ColumnarTable({
+        "Drug": (selected_codes[row_index], prices.drugs),
+        "Dosage": (dosage_codes[row_index], prices.dosages),
+        "Pharmacy": (pharmacy_index, prices.pharmacies),
+        "Price": table[quoted],
+    })
+    paged_dataframe(comparison_table, key="comparison", filterable=["Drug", "Pharmacy"])
 
     # Bar chart visualization
     st.subheader("Price Comparison Chart")
-    fig, ax = plt.subplots(figsize=(10, 6))
+    chart_series = []
     for drug in selected_drugs:
         dosage = selected_dosages[drug]
-        prices = drug_data[drug][dosage]
-        ax.bar([f"{drug} ({pharmacy})" for pharmacy in prices.keys()], prices.values(), label=f"{drug} {dosage}")
-    ax.set_ylabel("Price ($)")
-    ax.set_title("Drug Prices Across Pharmacies")
-    ax.legend()
-    st.pyplot(fig)
+        row_prices = prices.prices(drug, dosage)
+        quoted = np.flatnonzero(~np.isnan(row_prices))
+        names = prices.pharmacies.decode(quoted)
+        chart_series.append((f"{drug} {dosage}", tuple(f"{drug} ({pharmacy})" for pharmacy in names),
+                             tuple(row_prices[quoted].tolist())))
+
+    def draw_prices(fig):
+        ax = fig.subplots()
+        for label, bars, heights in chart_series:
+            ax.bar(bars, heights, label=label)
+        ax.set_ylabel("Price ($)")
+        ax.set_title("Drug Prices Across Pharmacies")
+        ax.legend()
+
+    st.image(chart_cache.render(("pharmacy_prices", chart_series), draw_prices, figsize=(10, 6)))
+
+    # Cheapest way to fill the whole regimen
+    st.subheader("Basket Optimizer")
+    penalty = st.number_input("Extra cost per additional pharmacy ($)", min_value=0.0, value=2.0, step=0.5)
+    basket = prices.generic_price[prices.rows(selected_dosages)]
+    single = cheapest_single_pharmacy(basket)
+    split = optimize_basket(basket, penalty=penalty)
+    if single:
+        st.markdown(f"**Cheapest single pharmacy:** {prices.pharmacies.labels[single.pharmacies[0]]} "
+                    f"for ${single.total:.2f}")
+    else:
+        st.markdown("**Cheapest single pharmacy:** no pharmacy stocks every selected drug")
+    if split:
+        st.markdown(f"**Cheapest split fill:** ${split.total:.2f} across {len(split.pharmacies)} "
+                    f"{'pharmacy' if len(split.pharmacies) == 1 else 'pharmacies'} "
+                    f"(${split.drug_cost:.2f} drugs + ${split.penalty_cost:.2f} extra-pharmacy cost)")
+        df_basket = pd.DataFrame({
+            "Drug": selected_drugs,
+            "Dosage": [selected_dosages[drug] for drug in selected_drugs],
+            "Pharmacy": prices.pharmacies.decode(split.assignment),
+            "Price": basket[np.arange(len(selected_drugs)), split.assignment],
+        })
+        st.dataframe(df_basket)
+
+show_chart_metrics(chart_cache)
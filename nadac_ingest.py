@@ -0,0 +1,180 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Streaming ingestion of the weekly NADAC CSV into a partitioned Parquet store.
+# The CSV is read in fixed-size chunks, each chunk is validated and narrowed to
+# compact types, then appended as a row group to the writer for its partition,
+# so peak memory depends on the chunk size and not on the file size.
+
+NADAC_COLUMNS = {
+    "NDC Description": "description",
+    "NDC": "ndc",
+    "NADAC_Per_Unit": "nadac_per_unit",
+    "Effective_Date": "effective_date",
+    "Pricing_Unit": "pricing_unit",
+    "Pharmacy_Type_Indicator": "pharmacy_type",
+    "OTC": "otc",
+    "Explanation_Code": "explanation_code",
+    "Classification_for_Rate_Setting": "classification",
+    "Corresponding_Generic_Drug_NADAC_Per_Unit": "generic_nadac_per_unit",
+    "Corresponding_Generic_Drug_Effective_Date": "generic_effective_date",
+    "As of Date": "as_of_date",
+}
+REQUIRED_COLUMNS = ["NDC Description", "NDC", "NADAC_Per_Unit", "Effective_Date", "As of Date"]
+
+_dictionary = pa.dictionary(pa.int32(), pa.string())
+NADAC_SCHEMA = pa.schema([
+    ("description", _dictionary),
+    ("ndc", _dictionary),
+    ("nadac_per_unit", pa.float32()),
+    ("effective_date", pa.date32()),
+    ("pricing_unit", _dictionary),
+    ("pharmacy_type", _dictionary),
+    ("otc", pa.bool_()),
+    ("explanation_code", _dictionary),
+    ("generic_nadac_per_unit", pa.float32()),
+    ("generic_effective_date", pa.date32()),
+])
+PARTITION_COLUMNS = ["as_of_date", "classification"]
+
+# NADAC prices are per pricing unit (one tablet, one mL, one gram). The dashboards
+# show prices per fill, taken as a 30-day supply of these many units.
+FILL_UNITS = {"EA": 30, "ML": 150, "GM": 30}
+DEFAULT_FILL_UNITS = 30
+
+_CATEGORICAL = ["description", "ndc", "pricing_unit", "pharmacy_type", "explanation_code"]
+_DATES = ["effective_date", "generic_effective_date", "as_of_date"]
+
+
+class NadacValidationError(ValueError):
+    pass
+
+
+def _narrow(chunk):
+    frame = chunk.rename(columns=NADAC_COLUMNS)
+    for column in NADAC_COLUMNS.values():
+        if column not in frame:
+            frame[column] = None
+
+    frame["ndc"] = frame["ndc"].str.strip().str.zfill(11)
+    frame["description"] = frame["description"].str.strip().str.upper()
+    frame["nadac_per_unit"] = pd.to_numeric(frame["nadac_per_unit"], errors="coerce").astype(np.float32)
+    frame["generic_nadac_per_unit"] = pd.to_numeric(frame["generic_nadac_per_unit"],
+                                                    errors="coerce").astype(np.float32)
+    for column in _DATES:
+        frame[column] = pd.to_datetime(frame[column], errors="coerce", format="mixed").dt.date
+    frame["otc"] = frame["otc"].str.strip().str.upper().map({"Y": True, "N": False})
+    frame["classification"] = frame["classification"].fillna("U").str.strip().replace("", "U")
+
+    valid = (
+        frame["ndc"].str.fullmatch(r"\d{11}", na=False)
+        & frame["description"].notna()
+        & np.isfinite(frame["nadac_per_unit"])
+        & (frame["nadac_per_unit"] >= 0)
+        & frame["effective_date"].notna()
+        & frame["as_of_date"].notna()
+    )
+    return frame[valid], int((~valid).sum())
+
+
+def _to_table(frame):
+    arrays = []
+    for field in NADAC_SCHEMA:
+        values = frame[field.name]
+        if field.name in _CATEGORICAL:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=NADAC_SCHEMA)
+
+
+def ingest_nadac(csv_path, store_path, chunksize=200_000):
+    # Returns counts of rows read, written and rejected plus the partitions touched.
+    with open(csv_path, newline="") as handle:
+        header = pd.read_csv(handle, nrows=0).columns
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise NadacValidationError(f"NADAC file {csv_path} is missing columns: {', '.join(missing)}")
+
+    usecols = [column for column in header if column in NADAC_COLUMNS]
+    part_name = os.path.splitext(os.path.basename(csv_path))[0] + ".parquet"
+    writers = {}
+    stats = {"rows_read": 0, "rows_written": 0, "rows_rejected": 0, "partitions": []}
+    try:
+        reader = pd.read_csv(csv_path, usecols=usecols, dtype=str, chunksize=chunksize,
+                             keep_default_na=False, na_values=[""])
+        for chunk in reader:
+            stats["rows_read"] += len(chunk)
+            frame, rejected = _narrow(chunk)
+            stats["rows_rejected"] += rejected
+            for (as_of, classification), part in frame.groupby(PARTITION_COLUMNS, sort=False):
+                key = (as_of.isoformat(), classification)
+                writer = writers.get(key)
+                if writer is None:
+                    directory = os.path.join(store_path, f"as_of_date={key[0]}", f"classification={key[1]}")
+                    os.makedirs(directory, exist_ok=True)
+                    writer = pq.ParquetWriter(os.path.join(directory, part_name), NADAC_SCHEMA,
+                                              compression="zstd")
+                    writers[key] = writer
+                writer.write_table(_to_table(part))
+                stats["rows_written"] += len(part)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    stats["partitions"] = sorted(writers)
+    return stats
+
+
+def open_nadac_store(store_path, columns=None, filter=None):
+    # Dictionary columns come back as pandas categoricals; partition keys are read from the path.
+    dataset = ds.dataset(store_path, format="parquet", partitioning="hive")
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def latest_nadac_prices(store_path, fill_units=FILL_UNITS):
+    # Most recent price for every generic-classified NDC, with drug name and strength split from the
+    # description; brand rows (LIPITOR, ...) are left out rather than passed off as generic quotes.
+    # generic_price is per fill (nadac_per_unit times the fill quantity for its pricing unit).
+    frame = open_nadac_store(store_path, columns=["description", "ndc", "nadac_per_unit", "pricing_unit",
+                                                  "effective_date", "as_of_date"],
+                             filter=ds.field("classification") == "G")
+    frame = frame.sort_values(["as_of_date", "effective_date"]).drop_duplicates("ndc", keep="last")
+
+    descriptions = frame["description"].astype("category")
+    parts = descriptions.cat.categories.to_series().str.extract(
+        r"^(?P<drug>.+?)\s+(?P<dosage>\d[\d.,/]*\s*(?:MG|MCG|G|ML|%|UNIT|UNITS|MEQ)\b.*)$"
+    )
+    parts["drug"] = parts["drug"].fillna(descriptions.cat.categories.to_series())
+    parts["dosage"] = parts["dosage"].fillna("N/A")
+    codes = descriptions.cat.codes.to_numpy()
+    units = frame["pricing_unit"].astype(object).str.strip().str.upper()
+    quantity = units.map(fill_units).fillna(DEFAULT_FILL_UNITS).to_numpy(dtype=np.float32)
+    per_unit = frame["nadac_per_unit"].to_numpy()
+    return pd.DataFrame({
+        "drug": pd.Categorical(parts["drug"].to_numpy()[codes]),
+        "dosage": pd.Categorical(parts["dosage"].to_numpy()[codes]),
+        "ndc": frame["ndc"].to_numpy(),
+        "nadac_per_unit": per_unit,
+        "generic_price": np.round(per_unit * quantity, 2).astype(np.float32),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a NADAC CSV into a partitioned Parquet store")
+    parser.add_argument("csv_path")
+    parser.add_argument("store_path")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    args = parser.parse_args()
+    stats = ingest_nadac(args.csv_path, args.store_path, chunksize=args.chunksize)
+    print(f"Read {stats['rows_read']} rows, wrote {stats['rows_written']}, rejected {stats['rows_rejected']} "
+          f"into {len(stats['partitions'])} partitions")
+
+
+if __name__ == "__main__":
+    main()
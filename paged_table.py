@@ -0,0 +1,86 @@
+import numpy as np
+import streamlit as st
+from result_frames import compact_frame, show_frame
+
+# Server-side windowing for large comparison tables.
+# A table is held as parallel NumPy columns (categorical columns as integer
+# codes plus a Codebook). Filters run on the codebook labels and then on the
+# codes, sorting selects only the rows up to the requested page with
+# argpartition, and a compact DataFrame (categoricals, float32 prices) is built
+# for that one page, so a 100k-row table costs one small page of serialization
+# per rerun instead of the whole table.
+
+
+class ColumnarTable:
+    def __init__(self, columns):
+        # columns: {title: values array or (codes array, Codebook)}, all of one length
+        self.columns = dict(columns)
+        self.n_rows = len(self._values(next(iter(self.columns))))
+
+    def _values(self, title):
+        column = self.columns[title]
+        return column[0] if isinstance(column, tuple) else column
+
+    def _sort_keys(self, title):
+        column = self.columns[title]
+        if isinstance(column, tuple):
+            codes, book = column
+            label_rank = np.argsort(np.argsort(np.asarray(book.labels, dtype=str), kind="stable"))
+            return label_rank[codes]
+        return column
+
+    def filter_mask(self, contains=None):
+        # Rows whose categorical columns contain the given text (case-insensitive): {title: text}
+        mask = np.ones(self.n_rows, dtype=bool)
+        for title, text in (contains or {}).items():
+            if not text:
+                continue
+            codes, book = self.columns[title]
+            matching = [code for code, label in enumerate(book.labels) if text.lower() in str(label).lower()]
+            mask &= np.isin(codes, matching)
+        return mask
+
+    def page(self, page=0, page_size=50, sort_by=None, descending=False, mask=None):
+        # (page frame with a continuous "Sr. No.", matching row count)
+        positions = np.flatnonzero(mask) if mask is not None else np.arange(self.n_rows)
+        start, stop = page * page_size, min((page + 1) * page_size, len(positions))
+        if sort_by is not None and start < stop:
+            keys = self._sort_keys(sort_by)[positions]
+            keys = -keys if descending else keys
+            if stop < len(positions):
+                # Everything below the stop-th key, then ties in row order, so equal keys
+                # split across a page boundary the same way on every call
+                kth = np.partition(keys, stop - 1)[stop - 1]
+                below = keys < kth
+                ties = np.flatnonzero(keys == kth)[:stop - int(below.sum())]
+                head = np.concatenate([np.flatnonzero(below), ties])
+                positions, keys = positions[head], keys[head]
+            positions = positions[np.lexsort((positions, keys))]
+        window = positions[start:stop]
+
+        columns = {"Sr. No.": np.arange(start + 1, start + len(window) + 1)}
+        for title, column in self.columns.items():
+            columns[title] = (column[0][window], column[1]) if isinstance(column, tuple) else column[window]
+        return compact_frame(columns), len(positions)
+
+
+def paged_dataframe(table, key, page_size=50, sortable=None, filterable=None):
+    # Sort, filter and page controls for a ColumnarTable; only the visible page is sent to the browser
+    sortable = list(sortable if sortable is not None else table.columns)
+    filterable = list(filterable or [])
+    controls = st.columns(len(filterable) + 2)
+    contains = {title: controls[i].text_input(f"Filter {title}", "", key=f"{key}_filter_{title}")
+                for i, title in enumerate(filterable)}
+    sort_by = controls[-2].selectbox("Sort by", [None] + sortable, format_func=lambda title: title or "Default order",
+                                     key=f"{key}_sort")
+    descending = controls[-1].toggle("Descending", key=f"{key}_descending")
+
+    mask = table.filter_mask(contains)
+    n_matching = int(mask.sum())
+    n_pages = max((n_matching + page_size - 1) // page_size, 1)
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, key=f"{key}_page") - 1
+    frame, _ = table.page(min(page, n_pages - 1), page_size, sort_by=sort_by, descending=descending, mask=mask)
+    show_frame(frame, hide_index=True)
+    st.caption(f"{n_matching:,} matching rows")
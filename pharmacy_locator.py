@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# ZIP-centroid lookup and a uniform grid index over pharmacy coordinates.
+# Pharmacies are bucketed into square cells (cell_miles on a side) and sorted by
+# cell key, so a radius query is a handful of searchsorted range lookups over
+# the covering cells followed by an exact haversine check on the candidates.
+# Pharmacies without coordinates (mail order) are always returned at distance 0.
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+class ZipCentroids:
+    def __init__(self, zip_codes, lat, lon):
+        self.index = {str(z).zfill(5): i for i, z in enumerate(zip_codes)}
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+
+    def lookup(self, zip_code):
+        # (lat, lon) for a ZIP code, or None when it is unknown
+        i = self.index.get(str(zip_code).strip()[:5].zfill(5))
+        if i is None:
+            return None
+        return self.lat[i], self.lon[i]
+
+    def __len__(self):
+        return len(self.index)
+
+
+def load_zip_centroids(path):
+    # Accepts zip,lat,lon or the Census ZCTA gazetteer columns GEOID,INTPTLAT,INTPTLONG.
+    # The gazetteer is tab-separated; the header picks the separator so the C parser is used.
+    with open(path, newline="") as handle:
+        sep = "\t" if "\t" in handle.readline() else ","
+    frame = pd.read_csv(path, sep=sep, dtype={"zip": str, "GEOID": str})
+    frame.columns = [column.strip() for column in frame.columns]
+    if "GEOID" in frame:
+        frame = frame.rename(columns={"GEOID": "zip", "INTPTLAT": "lat", "INTPTLONG": "lon"})
+    return ZipCentroids(frame["zip"], frame["lat"], frame["lon"])
+
+
+def haversine_miles(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class PharmacyLocator:
+    def __init__(self, location, cell_miles=10.0):
+        # location: (n_pharmacies, 2) array of lat/lon indexed by pharmacy code
+        location = np.asarray(location, dtype=np.float64)
+        self.n_pharmacies = len(location)
+        self.cell_degrees = cell_miles / MILES_PER_DEGREE_LAT
+        self._columns = int(np.ceil(360 / self.cell_degrees)) + 1
+
+        located = ~np.isnan(location).any(axis=1)
+        self.unlocated = np.flatnonzero(~located)
+        codes = np.flatnonzero(located)
+        keys = self._keys(location[codes, 0], location[codes, 1])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.codes = codes[order]
+        self.lat = location[self.codes, 0]
+        self.lon = location[self.codes, 1]
+
+    @classmethod
+    def from_catalog(cls, catalog, cell_miles=10.0):
+        return cls(catalog.pharmacy_location, cell_miles=cell_miles)
+
+    def _cells(self, lat, lon):
+        return (np.floor((np.asarray(lat) + 90) / self.cell_degrees).astype(np.int64),
+                np.floor((np.asarray(lon) + 180) / self.cell_degrees).astype(np.int64))
+
+    def _keys(self, lat, lon):
+        row, column = self._cells(lat, lon)
+        return row * self._columns + column
+
+    def within(self, lat, lon, radius_miles):
+        # Pharmacy codes within radius_miles of (lat, lon) and their distances, nearest first
+        lat_span = radius_miles / MILES_PER_DEGREE_LAT
+        lon_span = radius_miles / (MILES_PER_DEGREE_LAT * max(np.cos(np.radians(min(abs(lat) + lat_span, 89.9))),
+                                                              1e-6))
+        row_lo, col_lo = self._cells(lat - lat_span, lon - lon_span)
+        row_hi, col_hi = self._cells(lat + lat_span, lon + lon_span)
+        rows = np.arange(row_lo, row_hi + 1)
+        # Each row of cells is a contiguous key range (the grid does not wrap the antimeridian)
+        starts = np.searchsorted(self.keys, rows * self._columns + col_lo, side="left")
+        stops = np.searchsorted(self.keys, rows * self._columns + col_hi, side="right")
+        candidates = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)]) if len(rows) else []
+        candidates = np.asarray(candidates, dtype=np.int64)
+
+        distances = haversine_miles(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_miles
+        codes = np.concatenate([self.codes[candidates[keep]], self.unlocated])
+        distances = np.concatenate([distances[keep], np.zeros(len(self.unlocated))])
+        order = np.argsort(distances, kind="stable")
+        return codes[order], distances[order]
+
+    def distance_vector(self, lat, lon, radius_miles):
+        # Per-pharmacy distance array (inf outside the radius), for DrugCatalog.pharmacy_mask
+        distances = np.full(self.n_pharmacies, np.inf)
+        codes, found = self.within(lat, lon, radius_miles)
+        distances[codes] = found
+        return distances
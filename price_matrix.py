@@ -0,0 +1,163 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+import numpy as np
+
+from drug_catalog import Codebook
+
+# Read-only drug-dosage x pharmacy price matrix stored as .npy files and opened
+# with mmap_mode="r". Every session in a worker shares one mapping through the
+# module-level cache, and separate worker processes share the same page-cache
+# pages, so per-session memory does not grow with the catalog size.
+# Each build is written to its own versioned directory next to `path`, and
+# `path` is a symlink that is swapped to the new directory with os.replace, so
+# readers always see one complete version; the previous version is kept for
+# readers that resolved the link just before the swap.
+
+_LAYERS = ("generic_price", "brand_price")
+_open_matrices = {}
+_open_lock = threading.Lock()
+
+
+class PriceMatrix:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "labels.json")) as handle:
+            labels = json.load(handle)
+        self.drugs = Codebook(labels["drugs"])
+        self.dosages = Codebook(labels["dosages"])
+        self.pharmacies = Codebook(labels["pharmacies"])
+        self.pharmacy_types = Codebook(labels["pharmacy_types"])
+
+        self.row_drug = np.load(os.path.join(path, "row_drug.npy"), mmap_mode="r")
+        self.row_dosage = np.load(os.path.join(path, "row_dosage.npy"), mmap_mode="r")
+        self.pharmacy_type = np.load(os.path.join(path, "pharmacy_type.npy"), mmap_mode="r")
+        self.pharmacy_distance = np.load(os.path.join(path, "pharmacy_distance.npy"), mmap_mode="r")
+        self.layers = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _LAYERS}
+        self.generic_price = self.layers["generic_price"]
+        self.brand_price = self.layers["brand_price"]
+
+        self._rows = {(int(d), int(s)): i for i, (d, s) in enumerate(zip(self.row_drug, self.row_dosage))}
+        self._drug_dosages = {}
+        for d, s in self._rows:
+            self._drug_dosages.setdefault(d, []).append(s)
+
+    @property
+    def shape(self):
+        return self.generic_price.shape
+
+    def drug_names(self):
+        return list(self.drugs.labels)
+
+    def dosages_for(self, drug):
+        return [self.dosages.labels[code] for code in self._drug_dosages.get(self.drugs.code(drug), [])]
+
+    def row(self, drug, dosage):
+        return self._rows[(self.drugs.code(drug), self.dosages.code(dosage))]
+
+    def rows(self, drug_selections):
+        return np.fromiter((self.row(drug, dosage) for drug, dosage in drug_selections.items()),
+                           dtype=np.int64, count=len(drug_selections))
+
+    def prices(self, drug, dosage, layer="generic_price"):
+        # Zero-copy view of one row of the mapped matrix
+        return self.layers[layer][self.row(drug, dosage)]
+
+
+def _version_dir(path, version):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f".{os.path.basename(path)}@{version}")
+
+
+def published_version(path):
+    # Version of the matrix `path` currently points to, or None when nothing versioned is published
+    if not os.path.islink(path):
+        return None
+    prefix = f".{os.path.basename(path)}@"
+    target = os.path.basename(os.readlink(path))
+    return target[len(prefix):] if target.startswith(prefix) else None
+
+
+def build_price_matrix(catalog, path, version=None):
+    # Lay the catalog out densely (missing quotes are NaN) and publish it atomically at `path`.
+    # version names the build (e.g. a data_version of the catalog's source); a random one by default.
+    version = version or uuid.uuid4().hex
+    if len(catalog):
+        boundary = np.r_[True, (catalog.drug[1:] != catalog.drug[:-1]) | (catalog.dosage[1:] != catalog.dosage[:-1])]
+    else:
+        boundary = np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(boundary)
+    row_of_quote = np.cumsum(boundary) - 1
+    shape = (len(starts), len(catalog.pharmacies))
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    target = _version_dir(path, version)
+    if not os.path.isdir(target):
+        staging = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}-staging-", dir=parent)
+        try:
+            for name in _LAYERS:
+                layer = np.lib.format.open_memmap(os.path.join(staging, f"{name}.npy"), mode="w+",
+                                                  dtype=np.float32, shape=shape)
+                layer[:] = np.nan
+                layer[row_of_quote, catalog.pharmacy] = getattr(catalog, name)
+                layer.flush()
+                del layer
+            np.save(os.path.join(staging, "row_drug.npy"), catalog.drug[starts])
+            np.save(os.path.join(staging, "row_dosage.npy"), catalog.dosage[starts])
+            np.save(os.path.join(staging, "pharmacy_type.npy"), catalog.pharmacy_type)
+            np.save(os.path.join(staging, "pharmacy_distance.npy"), catalog.pharmacy_distance)
+            with open(os.path.join(staging, "labels.json"), "w") as handle:
+                json.dump({
+                    "drugs": [str(label) for label in catalog.drugs.labels],
+                    "dosages": [str(label) for label in catalog.dosages.labels],
+                    "pharmacies": [str(label) for label in catalog.pharmacies.labels],
+                    "pharmacy_types": [str(label) for label in catalog.pharmacy_types.labels],
+                }, handle)
+            # mkdtemp creates 0700 directories; other worker users need to map the files
+            os.chmod(staging, 0o755)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Another worker published the same version first
+                if not os.path.isdir(target):
+                    raise
+                shutil.rmtree(staging, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A matrix published as a plain directory by an older build: move it aside once
+        shutil.rmtree(path + ".unversioned", ignore_errors=True)
+        os.rename(path, path + ".unversioned")
+    link = os.path.join(parent, f".{os.path.basename(path)}-link-{uuid.uuid4().hex}")
+    os.symlink(os.path.basename(target), link)
+    os.replace(link, path)
+
+    # Keep the new and the previous version; older ones have no readers left to resolve them
+    prefix = f".{os.path.basename(path)}@"
+    keep = {os.path.realpath(target), previous}
+    for name in os.listdir(parent):
+        old = os.path.join(parent, name)
+        if name.startswith(prefix) and os.path.realpath(old) not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+    shutil.rmtree(path + ".unversioned", ignore_errors=True)
+    return path
+
+
+def open_price_matrix(path):
+    # One shared mapping per published version; a rebuilt matrix is picked up on the next call.
+    # The link is resolved once, so every file of one PriceMatrix comes from the same version.
+    resolved = os.path.realpath(path)
+    key = os.path.abspath(path)
+    with _open_lock:
+        cached = _open_matrices.get(key)
+        if cached is None or cached[0] != resolved:
+            cached = (resolved, PriceMatrix(resolved))
+            _open_matrices[key] = cached
+    return cached[1]
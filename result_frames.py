@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Compact result tables for st.dataframe.
+# Label columns become pandas categoricals (Arrow dictionary arrays: one small
+# integer per row plus each distinct label once), prices become float32
+# dollars and integers (serial numbers, cents) are downcast, so the Arrow
+# payload sent to the browser on each rerun is a fraction of the equivalent
+# object/float64 frame. show_frame displays float columns with a fixed number
+# of decimals so float32 rounding never shows in the table; values read back
+# out of a frame for text must be formatted the same way.
+
+MONEY_FORMAT = "%.2f"
+
+
+def categorical(codes, book):
+    # Categorical over only the labels that occur, so a page does not carry the whole codebook
+    used, inverse = np.unique(np.asarray(codes), return_inverse=True)
+    return pd.Categorical.from_codes(inverse.reshape(-1), categories=book.decode(used))
+
+
+def compact_frame(columns):
+    # columns: {title: (codes, Codebook) | label array | numeric array}
+    frame = {}
+    for title, values in columns.items():
+        if isinstance(values, tuple):
+            frame[title] = categorical(*values)
+            continue
+        values = np.asarray(values)
+        if values.dtype.kind in "OUS":
+            frame[title] = pd.Categorical(values)
+        elif values.dtype.kind == "f":
+            frame[title] = values.astype(np.float32)
+        elif values.dtype.kind in "iu" and len(values):
+            frame[title] = pd.to_numeric(values, downcast="integer")
+        else:
+            frame[title] = values
+    return pd.DataFrame(frame)
+
+
+def number_formats(frame, formats=None):
+    # Column config for every float32 column: two decimals unless `formats` says otherwise
+    formats = formats or {}
+    return {title: st.column_config.NumberColumn(format=formats.get(title, MONEY_FORMAT))
+            for title in frame.columns if frame[title].dtype == np.float32}
+
+
+def show_frame(frame, formats=None, **kwargs):
+    st.dataframe(frame, column_config=number_formats(frame, formats), **kwargs)
+
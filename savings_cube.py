@@ -0,0 +1,148 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from copay_engine import MISSING, to_cents
+from drug_catalog import Codebook
+
+# Materialized generic-vs-brand savings cube.
+# Every catalog quote x benefit plan lands in one cell of a dense
+# (condition, plan, pharmacy type, region) array, addressed by a mixed-radix
+# index, and the monthly measures are summed into it with one bincount per
+# measure. Queries slice and sum the dense array, so a drill-down touches only
+# the cube, never the quotes. Plans are what-if scenarios over the same book, so
+# queries that do not group by plan average across plans. A price change
+# subtracts the quotes' old contributions and adds the new ones in place, so a
+# new version of the same catalog only re-prices the quotes that changed.
+
+DIMENSIONS = ("condition", "plan", "pharmacy_type", "region")
+MEASURES = ("fills", "generic_cost", "brand_cost", "member_savings", "plan_savings")
+
+DIMENSION_TITLES = {"condition": "Condition", "plan": "Plan", "pharmacy_type": "Pharmacy Type", "region": "Region"}
+MEASURE_TITLES = {"fills": "Monthly Fills", "generic_cost": "Generic Cost ($)", "brand_cost": "Brand Cost ($)",
+                  "member_savings": "Member Savings ($)", "plan_savings": "Plan Savings ($)"}
+UNASSIGNED = "Unassigned"
+
+
+def catalog_layout(catalog):
+    # Digest of everything but prices: which quotes exist and where they land in the cube
+    digest = hashlib.sha256()
+    for array in (catalog.drug, catalog.dosage, catalog.pharmacy, catalog.drug_condition, catalog.pharmacy_type):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    for book in (catalog.conditions, catalog.pharmacies, catalog.pharmacy_types):
+        digest.update("\0".join(map(str, book.labels)).encode() + b"\1")
+    return digest.hexdigest()
+
+
+class SavingsCube:
+    def __init__(self, catalog, benefits, pharmacy_regions=None, volume=None):
+        # benefits: BenefitPlans; pharmacy_regions: {pharmacy: region}; volume: monthly fills per catalog row
+        pharmacy_regions = pharmacy_regions or {}
+        self.benefits = benefits
+        self.layout = catalog_layout(catalog)
+        self._lock = threading.Lock()
+        self.generic_cents = to_cents(catalog.generic_price)
+        self.brand_cents = to_cents(catalog.brand_price)
+        self.volume = np.ones(len(catalog), dtype=np.int64) if volume is None else np.asarray(volume, dtype=np.int64)
+
+        conditions = Codebook(catalog.conditions)
+        condition = catalog.drug_condition[catalog.drug].astype(np.int64)
+        if (condition < 0).any():
+            condition[condition < 0] = conditions.add(UNASSIGNED)
+        regions = Codebook()
+        pharmacy_region = np.fromiter((regions.add(pharmacy_regions.get(name, UNASSIGNED))
+                                       for name in catalog.pharmacies), dtype=np.int64, count=len(catalog.pharmacies))
+        self.dimensions = {"condition": conditions, "plan": benefits.plans,
+                           "pharmacy_type": catalog.pharmacy_types, "region": regions}
+        self.shape = tuple(len(self.dimensions[name]) for name in DIMENSIONS)
+
+        # Mixed-radix cell of each quote on the plan-0 slice; plan p is p * plan_stride further on
+        n_types, n_regions = self.shape[2], self.shape[3]
+        self.plan_stride = n_types * n_regions
+        type_code = catalog.pharmacy_type[catalog.pharmacy].astype(np.int64)
+        self.cell = (condition * self.shape[1] * self.plan_stride + type_code * n_regions
+                     + pharmacy_region[catalog.pharmacy])
+        self.values = np.zeros((len(MEASURES),) + self.shape, dtype=np.int64)
+        self.rebuild()
+
+    def _contributions(self, rows):
+        # (measures, plans, len(rows)) integer contributions of the given quotes
+        generic, brand, volume = self.generic_cents[rows], self.brand_cents[rows], self.volume[rows]
+        volume = np.where((generic == MISSING) | (brand == MISSING), 0, volume)
+        generic_member = self.benefits.member_share(generic, "generic")
+        brand_member = self.benefits.member_share(brand, "brand")
+        n_plans = self.shape[1]
+        return np.stack([
+            np.broadcast_to(volume, (n_plans, len(volume))),
+            np.broadcast_to(volume * generic, (n_plans, len(volume))),
+            np.broadcast_to(volume * brand, (n_plans, len(volume))),
+            volume * (brand_member - generic_member),
+            volume * ((brand - brand_member) - (generic - generic_member)),
+        ])
+
+    def _cells(self, rows):
+        return self.cell[rows][None, :] + np.arange(self.shape[1])[:, None] * self.plan_stride
+
+    def rebuild(self):
+        rows = np.arange(len(self.cell))
+        cells = self._cells(rows).ravel()
+        size = int(np.prod(self.shape))
+        flat = self.values.reshape(len(MEASURES), size)
+        for m, contribution in enumerate(self._contributions(rows)):
+            flat[m] = np.rint(np.bincount(cells, weights=contribution.ravel(), minlength=size))
+
+    def update_prices(self, rows, generic_price=None, brand_price=None):
+        # Re-price catalog rows and apply only the difference to the affected cells
+        rows = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            delta = -self._contributions(rows)
+            if generic_price is not None:
+                self.generic_cents[rows] = to_cents(generic_price)
+            if brand_price is not None:
+                self.brand_cents[rows] = to_cents(brand_price)
+            delta += self._contributions(rows)
+            cells = self._cells(rows).ravel()
+            flat = self.values.reshape(len(MEASURES), -1)
+            for m in range(len(MEASURES)):
+                np.add.at(flat[m], cells, delta[m].ravel())
+
+    def reprice(self, catalog):
+        # Bring the cube to a new version of the same catalog by re-pricing the changed quotes.
+        # Returns False, changing nothing, when the catalog's quotes or dimensions differ.
+        if catalog_layout(catalog) != self.layout:
+            return False
+        generic, brand = to_cents(catalog.generic_price), to_cents(catalog.brand_price)
+        rows = np.flatnonzero((generic != self.generic_cents) | (brand != self.brand_cents))
+        if len(rows):
+            self.update_prices(rows, catalog.generic_price[rows], catalog.brand_price[rows])
+        return True
+
+    def query(self, by=("condition",), where=None):
+        # Monthly measures grouped by `by` dimensions, with `where` = {dimension: [labels]} filters
+        where = where or {}
+        with self._lock:
+            cube = self.values.copy()
+        for axis, name in enumerate(DIMENSIONS, start=1):
+            if name in where:
+                book = self.dimensions[name]
+                cube = cube.take([book.index[label] for label in where[name] if label in book], axis=axis)
+        # Each plan prices the whole book, so plans are averaged (not summed) when not grouped by
+        drop = tuple(axis for axis, name in enumerate(DIMENSIONS, start=1) if name not in by and name != "plan")
+        totals = cube.sum(axis=drop, keepdims=True)
+        if "plan" not in by:
+            totals = totals.mean(axis=2, keepdims=True) if totals.shape[2] else totals.sum(axis=2, keepdims=True)
+        totals = totals.reshape((len(MEASURES),) + tuple(n for name, n in zip(DIMENSIONS, totals.shape[1:])
+                                                          if name in by))
+
+        kept = [name for name in DIMENSIONS if name in by]
+        labels = [self.dimensions[name].labels if name not in where else
+                  [label for label in where[name] if label in self.dimensions[name]] for name in kept]
+        grid = np.indices(totals.shape[1:]).reshape(len(kept), int(np.prod(totals.shape[1:])))
+        frame = pd.DataFrame({DIMENSION_TITLES[name]: np.asarray(labels[i], dtype=object)[grid[i]]
+                              for i, name in enumerate(kept)})
+        measures = totals.reshape(len(MEASURES), -1)
+        for m, name in enumerate(MEASURES):
+            frame[MEASURE_TITLES[name]] = np.rint(measures[m]).astype(np.int64) if name == "fills" else measures[m] / 100
+        return frame[measures[0] > 0].reset_index(drop=True)
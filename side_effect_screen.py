@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from drug_catalog import Codebook
+
+# Regimen screening for overlapping side effects and pairwise interactions.
+# Each drug's side effects are a bitset (one bit per effect, packed in uint64
+# words) and interactions are a symmetric sparse matrix in CSR form. Effects
+# carried by two or more drugs are found with a bit-sliced counter over the
+# regimen's words (shared |= seen & word; seen |= word), counted with popcount,
+# and interacting pairs with a CSR row gather. A whole patient panel runs the
+# same counter for every patient at once, one pass per regimen position, plus
+# one CSR walk over its drugs.
+
+
+def _popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1)
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1).sum(axis=-1)
+
+
+class SideEffectScreen:
+    def __init__(self, side_effects, interactions=None):
+        # side_effects: {drug: [effect, ...]}; interactions: {(drug_a, drug_b): (severity, note)}
+        interactions = interactions or {}
+        self.drugs = Codebook(side_effects)
+        for a, b in interactions:
+            self.drugs.add(a)
+            self.drugs.add(b)
+        self.effects = Codebook(effect for effects in side_effects.values() for effect in effects)
+
+        n_drugs, n_effects = len(self.drugs), len(self.effects)
+        n_words = max((n_effects + 63) // 64, 1)
+        effect_matrix = np.zeros((n_drugs, n_words * 64), dtype=bool)
+        for drug, effects in side_effects.items():
+            effect_matrix[self.drugs.code(drug), self.effects.codes(effects)] = True
+        self.bits = np.packbits(effect_matrix, axis=1, bitorder="little").view(np.uint64)
+
+        # Symmetric CSR: row i lists every drug j that interacts with i
+        self.severities = Codebook()
+        self.notes = []
+        pair_a, pair_b, pair_id = [], [], []
+        for k, ((a, b), (severity, note)) in enumerate(interactions.items()):
+            self.severities.add(severity)
+            self.notes.append(note)
+            code_a, code_b = self.drugs.code(a), self.drugs.code(b)
+            pair_a += [code_a, code_b]
+            pair_b += [code_b, code_a]
+            pair_id += [k, k]
+        self.pair_severity = np.asarray([self.severities.code(s) for s, _ in interactions.values()], dtype=np.int32)
+        pair_a = np.asarray(pair_a, dtype=np.int64)
+        order = np.argsort(pair_a, kind="stable")
+        self.indices = np.asarray(pair_b, dtype=np.int64)[order]
+        self.pair_ids = np.asarray(pair_id, dtype=np.int64)[order]
+        self.indptr = np.searchsorted(pair_a[order], np.arange(n_drugs + 1))
+        self.pair_a = np.asarray([self.drugs.code(a) for a, _ in interactions], dtype=np.int64)
+        self.pair_b = np.asarray([self.drugs.code(b) for _, b in interactions], dtype=np.int64)
+
+    def _codes(self, regimen):
+        return np.asarray([self.drugs.index[drug] for drug in regimen if drug in self.drugs], dtype=np.int64)
+
+    def _effect_codes(self, words):
+        # Effect codes of the set bits in one packed row
+        bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits[:len(self.effects)])
+
+    def overlap_matrix(self, regimen):
+        # (k, k) count of side effects shared by each pair of regimen drugs
+        bits = self.bits[self._codes(regimen)]
+        return _popcount(bits[:, None, :] & bits[None, :, :])
+
+    def overlapping_effects(self, regimen):
+        # Side effects carried by two or more drugs in the regimen
+        codes = self._codes(regimen)
+        seen = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        shared = np.zeros_like(seen)
+        for words in self.bits[codes]:
+            shared |= seen & words
+            seen |= words
+        effects = self._effect_codes(shared)
+        word, bit = np.divmod(effects, 64)
+        carriers = ((self.bits[codes][:, word] >> bit.astype(np.uint64)) & np.uint64(1)).astype(bool)
+        return pd.DataFrame({
+            "Side Effect": self.effects.decode(effects),
+            "Drugs": [", ".join(self.drugs.decode(codes[carriers[:, i]])) for i in range(len(effects))],
+            "Drug Count": carriers.sum(axis=0),
+        })
+
+    def interactions(self, regimen):
+        # Interacting pairs within the regimen, in listing order
+        codes = self._codes(regimen)
+        in_regimen = np.zeros(len(self.drugs), dtype=bool)
+        in_regimen[codes] = True
+        spans = [np.arange(self.indptr[c], self.indptr[c + 1]) for c in codes]
+        slots = np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+        pairs = np.unique(self.pair_ids[slots[in_regimen[self.indices[slots]]]])
+        return pd.DataFrame({
+            "Drug A": self.drugs.decode(self.pair_a[pairs]),
+            "Drug B": self.drugs.decode(self.pair_b[pairs]),
+            "Severity": self.severities.decode(self.pair_severity[pairs]),
+            "Note": [self.notes[p] for p in pairs],
+        })
+
+    def screen_panel(self, regimens):
+        # regimens: (patients, drugs) boolean matrix over drug codes.
+        # Returns per-patient counts of overlapping side effects and of interacting pairs.
+        regimens = np.asarray(regimens, dtype=bool)
+        patient, drug = np.nonzero(regimens)
+        # Bit-sliced counter per patient, one pass per regimen position (k-th drug of every patient)
+        sizes = np.bincount(patient, minlength=len(regimens))
+        position = np.arange(len(drug)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        seen = np.zeros((len(regimens), self.bits.shape[1]), dtype=np.uint64)
+        shared = np.zeros_like(seen)
+        for k in range(int(sizes.max(initial=0))):
+            at = position == k
+            holders, words = patient[at], self.bits[drug[at]]
+            shared[holders] |= seen[holders] & words
+            seen[holders] |= words
+        overlapping = _popcount(shared)
+        # Walk the CSR rows of each patient's drugs; every interacting pair is seen from both ends
+        lengths = self.indptr[drug + 1] - self.indptr[drug]
+        starts = np.repeat(self.indptr[drug] - np.cumsum(lengths) + lengths, lengths)
+        slots = starts + np.arange(lengths.sum())
+        patient = np.repeat(patient, lengths)
+        hits = regimens[patient, self.indices[slots]]
+        interacting = np.bincount(patient[hits], minlength=len(regimens)) // 2
+        return overlapping, interacting
@@ -0,0 +1,70 @@
+import base64
+import logging
+import mimetypes
+import os
+
+import streamlit as st
+
+# Bundled branding assets.
+# Logos and icons live in ./static next to the dashboards, so first paint never
+# waits on an external host (and works on air-gapped servers). Each asset is
+# read once per process. Inline HTML embeds it as a base64 data: URI, so the
+# browser makes no request for it at all (Streamlit's static and media routes
+# send no Cache-Control header, so a URL would be re-validated on every load);
+# st.image gets the bytes directly and embeds SVG markup the same way. A missing
+# asset is logged and shown as a caption instead of breaking the page.
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+logger = logging.getLogger(__name__)
+
+
+class Asset:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.url = f"data:{self.mimetype};base64,{base64.b64encode(data).decode()}"
+
+
+class AssetManifest:
+    def __init__(self, directory=ASSET_DIR):
+        self.directory = directory
+        self.assets = {}
+        self.missing = set()
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    with open(path, "rb") as handle:
+                        self.assets[name] = Asset(name, handle.read())
+
+    def get(self, name):
+        asset = self.assets.get(name)
+        if asset is None and name not in self.missing:
+            self.missing.add(name)
+            logger.warning("Static asset %s not found in %s", name, self.directory)
+        return asset
+
+
+@st.cache_resource
+def asset_manifest(directory=ASSET_DIR):
+    return AssetManifest(directory)
+
+
+def show_image(name, width=None, container=st):
+    # st.image for a bundled asset; a caption stands in when it is missing
+    asset = asset_manifest().get(name)
+    if asset is None:
+        container.caption(f"⚠️ Missing asset: {name}")
+        return
+    image = asset.data.decode() if asset.mimetype == "image/svg+xml" else asset.data
+    container.image(image, width=width)
+
+
+def img_tag(name, width):
+    # <img> for inline HTML, or an empty string when the asset is missing
+    asset = asset_manifest().get(name)
+    if asset is None:
+        return ""
+    return f"<img src='{asset.url}' width='{width}' alt='{os.path.splitext(name)[0]}'/>"
@@ -0,0 +1,60 @@
+import numpy as np
+
+# Seeded synthetic price model for demos and load tests.
+# Each value is a pure function of (seed, stream, drug code, pharmacy code): the
+# codes are hashed with the splitmix64 finalizer into 64 random bits, so a
+# whole variation array is one vectorized call, the same cell always gets the
+# same value regardless of call order or chunking, and benchmark catalogs can be
+# generated in parallel chunks of any size.
+
+GENERIC_STREAM = 0
+BRAND_STREAM = 1
+BASE_PRICE_STREAM = 2
+VOLUME_STREAM = 3
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x):
+    # Wrapping uint64 arithmetic is intended
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * _MIX1
+        x = (x ^ (x >> np.uint64(27))) * _MIX2
+        return x ^ (x >> np.uint64(31))
+
+
+class SyntheticPriceModel:
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def bits(self, drug, pharmacy, stream=GENERIC_STREAM):
+        drug = np.asarray(drug).astype(np.uint64)
+        pharmacy = np.asarray(pharmacy).astype(np.uint64)
+        key = _mix(np.uint64((self.seed + int(_GOLDEN) * (stream + 1)) % 2**64))
+        with np.errstate(over="ignore"):
+            cell = drug * _GOLDEN + pharmacy
+        return _mix(key ^ _mix(cell))
+
+    def uniform(self, drug, pharmacy, low=0.0, high=1.0, stream=GENERIC_STREAM):
+        # Floats in [low, high), broadcast over drug and pharmacy codes
+        unit = (self.bits(drug, pharmacy, stream) >> np.uint64(11)) * (1.0 / 2**53)
+        return low + (high - low) * unit
+
+    def integers(self, drug, pharmacy, low, high, stream=GENERIC_STREAM):
+        # Integers in [low, high] inclusive, like random.randint
+        span = np.uint64(high - low + 1)
+        return (self.bits(drug, pharmacy, stream) % span).astype(np.int64) + low
+
+    def quotes(self, n_drugs, n_pharmacies, chunk_size=10_000_000, low=5.0, high=200.0, spread=0.1):
+        # Yields (drug, pharmacy, generic_price) chunks covering every drug x pharmacy cell in order.
+        # Prices are a per-drug base price with a per-cell +/- spread; memory is bounded by chunk_size.
+        total = n_drugs * n_pharmacies
+        for start in range(0, total, chunk_size):
+            cell = np.arange(start, min(start + chunk_size, total), dtype=np.int64)
+            drug, pharmacy = np.divmod(cell, n_pharmacies)
+            first_drug = int(drug[0])
+            base = self.uniform(np.arange(first_drug, int(drug[-1]) + 1), 0, low, high, stream=BASE_PRICE_STREAM)
+            price = base[drug - first_drug] * (1 + self.uniform(drug, pharmacy, -spread, spread))
+            yield drug.astype(np.int32), pharmacy.astype(np.int32), np.round(price, 2).astype(np.float32)
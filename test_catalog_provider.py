@@ -0,0 +1,55 @@
+import gc
+import weakref
+
+from catalog_provider import cached_catalog, shared_resource
+from drug_catalog import DrugCatalog
+from drug_search import DrugSearch
+
+
+def drug_data(generic_price):
+    return {"Atorvastatin": {"dosages": ["10mg"], "generic_price": generic_price, "brand_price": 45}}
+
+
+def test_same_version_is_shared():
+    first = cached_catalog(DrugCatalog.from_generic_brand, drug_data(15), ["PharmaOne"])
+    assert cached_catalog(DrugCatalog.from_generic_brand, drug_data(15), ["PharmaOne"]) is first
+    assert not first.generic_price.flags.writeable
+
+
+def test_new_version_replaces_the_old_catalog():
+    old = cached_catalog(DrugCatalog.from_generic_brand, drug_data(15), ["PharmaOne"])
+    old_ref = weakref.ref(old)
+    new = cached_catalog(DrugCatalog.from_generic_brand, drug_data(12), ["PharmaOne"])
+    assert new.version != old.version
+    assert float(new.generic_price[0]) == 12
+    del old
+    gc.collect()
+    assert old_ref() is None
+
+
+def test_shared_resource_follows_the_catalog_version():
+    catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data(15), ["PharmaOne"])
+    search = shared_resource(DrugSearch.from_catalog, catalog, {"Atorvastatin": ["Lipitor"]})
+    assert shared_resource(DrugSearch.from_catalog, catalog, {"Atorvastatin": ["Lipitor"]}) is search
+    assert search.search("lipitor")[0] == "Atorvastatin"
+
+    catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data(12), ["PharmaOne"])
+    assert shared_resource(DrugSearch.from_catalog, catalog, {"Atorvastatin": ["Lipitor"]}) is not search
+
+
+class Counter:
+    def __init__(self, catalog):
+        self.prices = [float(catalog.generic_price[0])]
+
+
+def update_counter(counter, catalog):
+    counter.prices.append(float(catalog.generic_price[0]))
+    return True
+
+
+def test_shared_resource_updates_in_place():
+    catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data(15), ["PharmaOne"])
+    counter = shared_resource(Counter, catalog, update=update_counter)
+    catalog = cached_catalog(DrugCatalog.from_generic_brand, drug_data(12), ["PharmaOne"])
+    assert shared_resource(Counter, catalog, update=update_counter) is counter
+    assert counter.prices == [15, 12]
@@ -0,0 +1,20 @@
+import io
+
+import pandas as pd
+
+from claims_whatif import ClaimsPricer
+
+DRUG_DATA = {"Atorvastatin": {"generic_price": 15, "brand_price": 45}}
+
+
+def reprice(csv):
+    pricer = ClaimsPricer(DRUG_DATA)
+    claims = pd.read_csv(io.StringIO(csv), dtype={"drug": str, "fill_type": str})
+    return pricer.summary(pricer.reprice(claims)).set_index("Drug").loc["Atorvastatin"]
+
+
+def test_blank_and_non_numeric_quantities_count_as_one_fill():
+    row = reprice("drug,fill_type,quantity\nAtorvastatin,brand,\nAtorvastatin,brand,2\nAtorvastatin,generic,n/a\n")
+    assert row["Claims"] == 3
+    assert row["Current Cost ($)"] == 45 + 90 + 15
+    assert row["Generic Switch Savings ($)"] == 30 + 60
@@ -0,0 +1,23 @@
+import numpy as np
+
+from formulary_rules import FormularyEngine, status_labels
+
+RULES = {
+    "Plan A": [
+        {"when": {"price": ("<", 20)}, "then": {"tier": 1}},
+        {"when": {"price": ("<", 50)}, "then": {"tier": 2, "prior_auth": True}},
+        {"when": {"price": (">=", 30)}, "then": {"quantity_limit": 60}},
+    ],
+}
+
+
+def test_status_labels():
+    engine = FormularyEngine(RULES)
+    results = engine.evaluate({"price": np.array([10.0, 35.0, 80.0])})
+    assert status_labels(results, 0).tolist() == ["Covered (Tier 1)", "Covered (Tier 2, PA, QL 60)", "Not Covered"]
+
+
+def test_status_labels_for_no_rows():
+    engine = FormularyEngine(RULES)
+    results = engine.evaluate({"price": np.array([], dtype=np.float64)})
+    assert status_labels(results, 0).tolist() == []
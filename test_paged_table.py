@@ -0,0 +1,50 @@
+import numpy as np
+
+from drug_catalog import Codebook
+from paged_table import ColumnarTable
+
+
+def make_table(n_rows=5000):
+    rng = np.random.default_rng(7)
+    return ColumnarTable({
+        "Row": np.arange(n_rows),
+        "Drug": (rng.integers(0, 5, n_rows), Codebook(["Atorvastatin", "Lisinopril", "Metformin",
+                                                          "Omeprazole", "Amlodipine"])),
+        "Price ($)": rng.integers(0, 40, n_rows) / 4,
+    })
+
+
+def walk_pages(table, page_size=50, **kwargs):
+    rows, page = [], 0
+    while True:
+        frame, n_matching = table.page(page, page_size, **kwargs)
+        if frame.empty:
+            return rows, n_matching
+        rows.extend(frame["Row"].tolist())
+        page += 1
+
+
+def test_sorted_pages_cover_every_row_once():
+    table = make_table()
+    for sort_by in ["Drug", "Price ($)", "Row", None]:
+        for descending in [False, True]:
+            rows, n_matching = walk_pages(table, sort_by=sort_by, descending=descending)
+            assert n_matching == table.n_rows
+            assert sorted(rows) == list(range(table.n_rows))
+
+
+def test_sorted_pages_follow_sort_order_then_row_order():
+    table = make_table()
+    rows, _ = walk_pages(table, sort_by="Price ($)")
+    prices = table.columns["Price ($)"][rows]
+    assert np.all(np.diff(prices) >= 0)
+    ties = np.diff(prices) == 0
+    assert np.all(np.diff(rows)[ties] > 0)
+
+
+def test_filtered_pages_cover_every_matching_row_once():
+    table = make_table()
+    mask = table.filter_mask({"Drug": "in"})
+    rows, n_matching = walk_pages(table, sort_by="Drug", mask=mask)
+    assert n_matching == int(mask.sum())
+    assert sorted(rows) == np.flatnonzero(mask).tolist()
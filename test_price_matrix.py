@@ -0,0 +1,37 @@
+import os
+import stat
+
+import numpy as np
+
+from drug_catalog import DrugCatalog
+from price_matrix import build_price_matrix, open_price_matrix, published_version
+
+
+def make_catalog(price):
+    drug_data = {"Atorvastatin": {"10mg": {"Pharmacy A": price, "Pharmacy B": 11.0}}}
+    return DrugCatalog.from_pharmacy_prices(drug_data)
+
+
+def test_rebuild_swaps_the_published_version(tmp_path):
+    path = str(tmp_path / "price_matrix")
+    build_price_matrix(make_catalog(12.5), path, version="v1")
+    first = open_price_matrix(path)
+    assert published_version(path) == "v1"
+    assert stat.S_IMODE(os.stat(os.path.realpath(path)).st_mode) == 0o755
+
+    build_price_matrix(make_catalog(9.0), path, version="v2")
+    second = open_price_matrix(path)
+    assert published_version(path) == "v2"
+    np.testing.assert_allclose(second.prices("Atorvastatin", "10mg"), [9.0, 11.0])
+    # Sessions still holding the old version keep reading it
+    np.testing.assert_allclose(first.prices("Atorvastatin", "10mg"), [12.5, 11.0])
+
+
+def test_only_the_current_and_previous_versions_are_kept(tmp_path):
+    path = str(tmp_path / "price_matrix")
+    legacy = tmp_path / "price_matrix"
+    legacy.mkdir()
+    for version in ("v1", "v2", "v3"):
+        build_price_matrix(make_catalog(12.5), path, version=version)
+    assert os.path.islink(path)
+    assert sorted(os.listdir(tmp_path)) == [".price_matrix@v2", ".price_matrix@v3", "price_matrix"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from benefit_engine import BenefitPlans
+from drug_catalog import DrugCatalog
+from savings_cube import SavingsCube
+
+BENEFIT_PLANS = {
+    "Bronze": {"deductible": 500, "oop_max": 4000, "generic": {"copay": 15}, "brand": {"coinsurance": 0.4}},
+    "Gold": {"deductible": 0, "oop_max": 2000, "generic": {"copay": 5}, "brand": {"copay": 40}},
+}
+REGIONS = {"PharmaOne": "Northeast", "HealthPlus": "Midwest"}
+
+
+def make_catalog(atorvastatin_price):
+    drug_data = {
+        "Atorvastatin": {"dosages": ["10mg", "20mg"], "generic_price": atorvastatin_price, "brand_price": 45,
+                         "condition": "Cholesterol"},
+        "Lisinopril": {"dosages": ["10mg"], "generic_price": 10, "brand_price": 30, "condition": "Blood Pressure"},
+    }
+    return DrugCatalog.from_generic_brand(drug_data, list(REGIONS))
+
+
+def make_cube(catalog):
+    volume = np.arange(len(catalog)) + 20
+    return SavingsCube(catalog, BenefitPlans(BENEFIT_PLANS), REGIONS, volume=volume)
+
+
+def test_reprice_matches_a_rebuild():
+    cube = make_cube(make_catalog(15))
+    repriced = make_catalog(12)
+    assert cube.reprice(repriced)
+    expected = make_cube(repriced)
+    for by in (["condition"], ["plan", "region"], ["condition", "pharmacy_type"]):
+        pd.testing.assert_frame_equal(cube.query(by=by), expected.query(by=by))
+
+
+def test_reprice_refuses_a_different_layout():
+    cube = make_cube(make_catalog(15))
+    before = cube.values.copy()
+    other = DrugCatalog.from_generic_brand(
+        {"Metformin": {"dosages": ["500mg"], "generic_price": 12, "brand_price": 35, "condition": "Diabetes"}},
+        list(REGIONS))
+    assert not cube.reprice(other)
+    np.testing.assert_array_equal(cube.values, before)
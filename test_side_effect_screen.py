@@ -0,0 +1,33 @@
+import numpy as np
+
+from side_effect_screen import SideEffectScreen
+
+SIDE_EFFECTS = {
+    "Atorvastatin": ["Muscle pain", "Headache", "Nausea"],
+    "Lisinopril": ["Cough", "Dizziness", "Headache"],
+    "Metformin": ["Nausea", "Diarrhea", "Headache"],
+    "Amlodipine": ["Swelling", "Dizziness"],
+}
+INTERACTIONS = {
+    ("Lisinopril", "Amlodipine"): ("Moderate", "Additive blood pressure lowering"),
+    ("Metformin", "Lisinopril"): ("Minor", "May increase risk of low blood sugar"),
+}
+
+
+def test_overlapping_effects():
+    screen = SideEffectScreen(SIDE_EFFECTS, INTERACTIONS)
+    overlap = screen.overlapping_effects(["Atorvastatin", "Lisinopril", "Metformin"])
+    assert overlap["Side Effect"].tolist() == ["Headache", "Nausea"]
+    assert overlap["Drugs"].tolist() == ["Atorvastatin, Lisinopril, Metformin", "Atorvastatin, Metformin"]
+    assert overlap["Drug Count"].tolist() == [3, 2]
+
+
+def test_panel_matches_single_regimens():
+    screen = SideEffectScreen(SIDE_EFFECTS, INTERACTIONS)
+    rng = np.random.default_rng(3)
+    regimens = rng.random((200, len(screen.drugs))) < 0.5
+    overlapping, interacting = screen.screen_panel(regimens)
+    for patient, regimen in enumerate(regimens):
+        names = screen.drugs.decode(np.flatnonzero(regimen))
+        assert overlapping[patient] == len(screen.overlapping_effects(names))
+        assert interacting[patient] == len(screen.interactions(names))
@@ -0,0 +1,12 @@
+from therapeutic_index import AlternativeIndex
+
+ALTERNATIVES = {"Atorvastatin": [("Simvastatin", 9), ("Rosuvastatin", 14), ("Pravastatin", 8)]}
+
+
+def test_cheapest_alternative_respects_min_efficacy():
+    index = AlternativeIndex(ALTERNATIVES, {"Atorvastatin": 12},
+                             {"Atorvastatin": 8.5, "Simvastatin": 7.8, "Rosuvastatin": 8.8})
+    assert index.cheapest_alternative("Atorvastatin")[0] == "Pravastatin"
+    # Pravastatin is unscored and Simvastatin scores lower, so neither is comparable
+    assert index.cheapest_alternative("Atorvastatin", min_efficacy=8.5)[0] == "Rosuvastatin"
+    assert index.cheapest_alternative("Atorvastatin", min_efficacy=9.0) is None
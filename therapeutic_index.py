@@ -0,0 +1,95 @@
+import bisect
+import math
+
+# Precomputed therapeutic-alternative index.
+# Every drug and its listed alternatives are merged into equivalence classes
+# (drugs that share an alternative end up in the same class). Each class keeps
+# its members sorted by (price, -efficacy), so the cheapest comparable option
+# and "everything cheaper than X" are bisect lookups, and a price change only
+# re-inserts one member of one class.
+
+
+class AlternativeIndex:
+    def __init__(self, therapeutic_alternatives, prices, efficacy=None):
+        # therapeutic_alternatives: {drug: [(alternative, price), ...]}
+        # prices: {drug: price} for the drugs themselves; efficacy: optional {name: score}
+        efficacy = efficacy or {}
+        parent = {}
+
+        def find(name):
+            parent.setdefault(name, name)
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        member_prices = dict(prices)
+        for drug, alternatives in therapeutic_alternatives.items():
+            find(drug)
+            for alternative, price in alternatives:
+                member_prices.setdefault(alternative, price)
+                parent[find(alternative)] = find(drug)
+
+        self.class_of = {}
+        self.price = {}
+        self.efficacy = {}
+        self._classes = {}
+        for name in list(parent):
+            root = find(name)
+            self.class_of[name] = root
+            self.price[name] = member_prices.get(name, math.nan)
+            self.efficacy[name] = efficacy.get(name, math.nan)
+            self._classes.setdefault(root, []).append(self._key(name))
+        for members in self._classes.values():
+            members.sort()
+
+    @classmethod
+    def from_catalog(cls, catalog, therapeutic_alternatives, efficacy=None):
+        # Drugs priced at their lowest generic price in the catalog
+        generic, _ = catalog.drug_price_summary()
+        return cls(therapeutic_alternatives,
+                   {drug: float(generic[code]) for code, drug in enumerate(catalog.drug_names())}, efficacy)
+
+    def _key(self, name):
+        price = self.price[name]
+        efficacy = self.efficacy[name]
+        return (math.inf if math.isnan(price) else price, -efficacy if not math.isnan(efficacy) else 0.0, name)
+
+    def __contains__(self, name):
+        return name in self.class_of
+
+    def members(self, name):
+        # (name, price, efficacy) for every member of name's class, cheapest first
+        return [(member, self.price[member], self.efficacy[member])
+                for _, _, member in self._classes.get(self.class_of.get(name), [])]
+
+    def alternatives(self, name):
+        return [member for member in self.members(name) if member[0] != name]
+
+    def cheaper_than(self, name, price=None):
+        # Alternatives strictly cheaper than name's current price (or the given price), cheapest first
+        price = self.price[name] if price is None else price
+        members = self._classes.get(self.class_of.get(name), [])
+        stop = bisect.bisect_left(members, (price, -math.inf, ""))
+        return [(member, self.price[member], self.efficacy[member])
+                for _, _, member in members[:stop] if member != name]
+
+    def cheapest_alternative(self, name, min_efficacy=None):
+        # Cheapest other member of the class; with min_efficacy, skip members scored below it or unscored
+        for member, price, efficacy in self.alternatives(name):
+            if min_efficacy is None or efficacy >= min_efficacy:
+                return member, price, efficacy
+        return None
+
+    def update_price(self, name, price):
+        # Incremental re-index of one member after a price change
+        if name not in self.class_of:
+            root = name
+            self.class_of[name] = root
+            self._classes[root] = []
+            self.efficacy[name] = math.nan
+        else:
+            members = self._classes[self.class_of[name]]
+            del members[bisect.bisect_left(members, self._key(name))]
+        self.price[name] = price
+        bisect.insort(self._classes[self.class_of[name]], self._key(name))